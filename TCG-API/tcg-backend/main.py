@@ -4,31 +4,98 @@ Trading Card Game API
 Búsqueda y filtrado de cartas de One Piece, Yu-Gi-Oh, Pokémon y Magic
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from pydantic import BaseModel, Field
 from typing import Optional, List
+import anyio
+import asyncio
 import sqlite3
 import json
+import math
+import base64
+import contextvars
+import csv
+import hashlib
+import io
+from email.utils import formatdate, parsedate_to_datetime
+import re
+import bisect
+import heapq
+import logging
+from logging.handlers import RotatingFileHandler
+from collections import OrderedDict
+from operator import itemgetter
+import os
+import threading
+import time
+import unicodedata
+import weakref
+import zlib
+from array import array
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="Trading Card API",
     description="API para buscar cartas de TCG",
     version="1.0.0"
 )
 
-# CORS para que el frontend pueda llamar desde cualquier lado
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Ruta de la base de datos (el standardizer la reemplaza con un rename atómico)
+DB_PATH = Path(os.getenv("TCG_DB_PATH", "tcg_unified.db"))
+
+# Cada cuánto se comprueba si hay una base de datos nueva (segundos)
+DB_WATCH_INTERVAL = float(os.getenv("TCG_DB_WATCH_INTERVAL", "2"))
+
+# Pool de lectura: una conexión por hilo del threadpool de FastAPI
+DB_WORKER_THREADS = int(os.getenv("TCG_DB_THREADS", "40"))
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_CACHE_SIZE_KB = 64 * 1024
+DB_CACHED_STATEMENTS = 256
+
+# Totales de búsqueda/filtro: cuántos se guardan y hasta dónde cuenta count=estimate
+TOTAL_CACHE_SIZE = 4096
+COUNT_ESTIMATE_CAP = 1000
+
+# Máximo de IDs por petición a /api/cards/batch
+BATCH_MAX_IDS = 1000
+
+# Caché de respuestas: límite de memoria y expiración (segundos)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("TCG_RESPONSE_CACHE_MB", "64")) * 1024 * 1024
+RESPONSE_CACHE_TTL = int(os.getenv("TCG_RESPONSE_CACHE_TTL", "3600"))
 
-# Ruta de la base de datos
-DB_PATH = Path("tcg_unified.db")
+# Cache-Control para navegadores y el proxy nginx (segundos)
+HTTP_CACHE_MAX_AGE = int(os.getenv("TCG_HTTP_MAX_AGE", "300"))
+
+# Log de consultas lentas: umbral (ms, 0 lo desactiva), archivo y rotación
+SLOW_QUERY_MS = float(os.getenv("TCG_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.getenv("TCG_SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+# Cada cuántas instrucciones de la VM de SQLite se llama al progress handler
+DB_PROGRESS_STEPS = 1000
+
+# match=fuzzy: similitud mínima (Jaccard de trigramas) y nombres candidatos como máximo
+FUZZY_THRESHOLD = float(os.getenv("TCG_FUZZY_THRESHOLD", "0.3"))
+FUZZY_MAX_NAMES = 200
+
+# Facetas de búsqueda: límites superiores de los tramos de precio y valores por faceta
+FACET_PRICE_BUCKETS = (1, 5, 10, 25, 50, 100)
+FACET_MAX_VALUES = 50
+
+# /api/export: filas leídas del cursor por bloque y nivel de gzip
+EXPORT_CHUNK_ROWS = int(os.getenv("TCG_EXPORT_CHUNK_ROWS", "1000"))
+EXPORT_GZIP_LEVEL = 6
 
 # ==================== MODELS ====================
 
@@ -50,60 +117,1438 @@ class Card(BaseModel):
     archetype: Optional[str]
 
 class SearchResult(BaseModel):
-    total: int
+    total: Optional[int]
+    total_exact: bool = True
     cards: List[Card]
+    next_cursor: Optional[str] = None
+    facets: Optional[dict] = None
+
+class CardBatchRequest(BaseModel):
+    card_ids: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_IDS)
 
 class GameStats(BaseModel):
     game: str
     count: int
+    prices: Optional[dict] = None
+
+# ==================== METRICS ====================
+
+# Límites de los histogramas (segundos y filas por petición)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 25, 50, 100, 500, 1000, 10000)
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Histogram:
+    """Histograma con etiquetas en formato de exposición de Prometheus"""
+    
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Conteo por bucket (no acumulado), suma y total
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total, n) for labels, (counts, total, n) in self._series.items()]
+        for labels, counts, total, n in sorted(snapshot):
+            label_text = ",".join(
+                f'{name}="{escape_label(value)}"' for name, value in zip(self.label_names, labels)
+            )
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {n}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {n}")
+        return lines
+
+request_latency = Histogram(
+    "tcg_http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta",
+    ("route", "method", "status"), LATENCY_BUCKETS
+)
+request_phase = Histogram(
+    "tcg_request_phase_seconds",
+    "Tiempo por petición en SQLite, conversión de filas y serialización JSON",
+    ("route", "phase"), LATENCY_BUCKETS
+)
+request_rows = Histogram(
+    "tcg_db_rows_returned", "Filas leídas de SQLite por petición",
+    ("route",), ROW_BUCKETS
+)
+
+class RequestMetrics:
+    """Tiempos y filas acumulados durante una petición"""
+    
+    def __init__(self, route: Optional[str] = None):
+        self.route = route
+        self.sqlite_seconds = 0.0
+        self.convert_seconds = 0.0
+        self.json_seconds = 0.0
+        self.rows = 0
+        self.statements = 0
+
+# La petición en curso (el contexto se copia al threadpool de los endpoints)
+current_metrics = contextvars.ContextVar("current_metrics", default=None)
+
+slow_query_logger = logging.getLogger("tcg.slow_queries")
+slow_query_logger.propagate = False
+
+def configure_slow_query_log():
+    """Escribir las consultas lentas como JSON por línea en un archivo rotativo"""
+    if SLOW_QUERY_MS <= 0 or slow_query_logger.handlers:
+        return
+    handler = RotatingFileHandler(SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_BYTES,
+                                  backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.INFO)
+
+def param_shape(value) -> str:
+    """Tipo (y longitud) de un parámetro, sin registrar su valor"""
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+class StatementTrace:
+    """Una sentencia en curso: desde execute hasta que se leen sus filas"""
+    
+    def __init__(self, sql: str, parameters, steps: int):
+        self.sql = sql
+        self.parameters = parameters
+        self.steps = steps
+        self.seconds = 0.0
+        self.rows = 0
+    
+    def log(self, connection):
+        if not slow_query_logger.handlers or self.seconds * 1000 < SLOW_QUERY_MS:
+            return
+        metrics = current_metrics.get()
+        parameters = self.parameters.values() if isinstance(self.parameters, dict) else self.parameters
+        slow_query_logger.info(json.dumps({
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "route": metrics.route if metrics else None,
+            "ms": round(self.seconds * 1000, 3),
+            "vm_steps": connection.vm_steps - self.steps,
+            "rows": self.rows,
+            "sql": " ".join(self.sql.split()),
+            "params": [param_shape(value) for value in parameters]
+        }, ensure_ascii=False))
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Cursor que suma su tiempo y sus filas a la petición en curso
+    
+    Además sigue cada sentencia desde execute hasta su última lectura
+    (fetchall, fetchone, o un fetchmany incompleto) y, si supera
+    SLOW_QUERY_MS, la escribe en el log de consultas lentas con las
+    instrucciones de VM contadas por el progress handler. El módulo
+    sqlite3 no expone sqlite3_profile, así que el tiempo se mide
+    alrededor de las llamadas al cursor.
+    """
+    
+    _statement = None
+    
+    def _finish(self):
+        if self._statement is not None:
+            self._statement.log(self.connection)
+            self._statement = None
+    
+    def execute(self, sql, parameters=()):
+        self._finish()
+        statement = StatementTrace(sql, parameters, self.connection.vm_steps)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            statement.seconds = time.perf_counter() - start
+            self._statement = statement
+            metrics = current_metrics.get()
+            if metrics is not None:
+                metrics.sqlite_seconds += statement.seconds
+                metrics.statements += 1
+    
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        elapsed = time.perf_counter() - start
+        
+        rows = len(result) if isinstance(result, list) else int(result is not None)
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.sqlite_seconds += elapsed
+            metrics.rows += rows
+        
+        if self._statement is not None:
+            self._statement.seconds += elapsed
+            self._statement.rows += rows
+        return result
+    
+    def fetchone(self):
+        row = self._timed_fetch(super().fetchone)
+        self._finish()
+        return row
+    
+    def fetchmany(self, size=None):
+        size = size if size is not None else self.arraysize
+        rows = self._timed_fetch(super().fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+    
+    def fetchall(self):
+        rows = self._timed_fetch(super().fetchall)
+        self._finish()
+        return rows
+    
+    def close(self):
+        self._finish()
+        super().close()
+
+class TimedConnection(sqlite3.Connection):
+    """Conexión cuyas consultas pasan por TimedCursor"""
+    
+    # Instrucciones de VM ejecutadas (en múltiplos de DB_PROGRESS_STEPS)
+    vm_steps = 0
+    
+    def _count_steps(self) -> int:
+        self.vm_steps += DB_PROGRESS_STEPS
+        return 0
+    
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+def route_template(request: Request) -> str:
+    """Plantilla de la ruta (/api/cards/{card_id}) para no crear una serie por URL"""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
 
 # ==================== DATABASE HELPERS ====================
 
-def get_db_connection():
-    """Conectar a base de datos"""
-    conn = sqlite3.connect(str(DB_PATH))
+def open_read_connection(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Abrir una conexión de solo lectura con los PRAGMAs de lectura"""
+    uri = db_path.resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=DB_CACHED_STATEMENTS,
+                           check_same_thread=check_same_thread, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
+    conn.set_progress_handler(conn._count_steps, DB_PROGRESS_STEPS)
+    conn.execute("PRAGMA query_only = 1")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
     return conn
 
-def row_to_card(row) -> Card:
-    """Convertir fila de SQLite a objeto Card"""
-    return Card(
-        card_id=row['card_id'],
-        name=row['name'],
-        game=row['game'],
-        type=row['type'] or '',
-        rarity=row['rarity'] or 'Unknown',
-        image_url=row['image_url'] or '',
-        effect=row['effect'],
-        price_usd=row['price_usd'],
-        power=row['power'],
-        hp=row['hp'],
-        toughness=row['toughness'],
-        cost=row['cost'],
-        color=row['color'],
-        abilities=row['abilities'],
-        archetype=row['archetype']
+class PooledConnection:
+    """Conexión de un hilo y la versión de base de datos sobre la que se abrió"""
+    
+    def __init__(self, conn: sqlite3.Connection, version: Optional[tuple]):
+        self.conn = conn
+        self.version = version
+
+class ConnectionPool:
+    """
+    Conexiones SQLite de solo lectura, una por hilo
+    
+    Los endpoints corren en el threadpool de FastAPI; cada hilo reutiliza
+    su propia conexión (abierta con mode=ro y PRAGMAs de lectura) y su
+    caché de sentencias preparadas.
+    
+    Cuando el standardizer publica una base de datos nueva (rename
+    atómico) las peticiones en curso terminan sobre el archivo anterior,
+    que sigue abierto; cada hilo cierra su conexión vieja y abre una
+    sobre el archivo nuevo en su siguiente petición. Las conexiones de
+    hilos que terminan se cierran al recolectarse el hilo.
+    """
+    
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._versions = {}
+    
+    @property
+    def open_connections(self) -> int:
+        with self._lock:
+            return sum(self._versions.values())
+    
+    def stats(self) -> dict:
+        """Conexiones abiertas sobre la versión actual y sobre versiones anteriores"""
+        current = get_db_version()
+        with self._lock:
+            open_total = sum(self._versions.values())
+            open_current = self._versions.get(current, 0)
+        return {
+            "open": open_total,
+            "current": open_current,
+            "stale": open_total - open_current
+        }
+    
+    def _connect(self, version: Optional[tuple]) -> PooledConnection:
+        # Solo la usa su hilo, pero el finalize que la cierra corre en el
+        # hilo que recolecte el PooledConnection (p.ej. al apagar)
+        conn = open_read_connection(self.db_path, check_same_thread=False)
+        pooled = PooledConnection(conn, version)
+        with self._lock:
+            self._versions[version] = self._versions.get(version, 0) + 1
+        # Si el hilo termina sin volver a pedir conexión, cerrarla igualmente
+        weakref.finalize(pooled, self._release, conn, version)
+        return pooled
+    
+    def _release(self, conn: sqlite3.Connection, version: Optional[tuple]):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._versions[version] -= 1
+                if not self._versions[version]:
+                    del self._versions[version]
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Conexión del hilo actual, reabierta si la base de datos cambió"""
+        version = get_db_version()
+        pooled = getattr(self._local, "pooled", None)
+        
+        if pooled is None or pooled.version != version:
+            # Soltar la conexión vieja dispara su finalize (close)
+            self._local.pooled = None
+            pooled = self._connect(version)
+            self._local.pooled = pooled
+        
+        return pooled.conn
+
+db_pool = ConnectionPool(DB_PATH)
+
+def get_db_connection():
+    """
+    Conexión de solo lectura del pool
+    
+    La conexión pertenece al hilo actual: no cerrarla.
+    """
+    return db_pool.acquire()
+
+def get_db_version() -> Optional[tuple]:
+    """
+    Identificar la versión del archivo de base de datos
+    
+    Cambia cuando el standardizer regenera tcg_unified.db (inode, mtime o
+    tamaño distintos). Retorna None si el archivo no existe.
+    """
+    try:
+        st = DB_PATH.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def has_table(conn, name: str) -> bool:
+    """Verificar si la base de datos tiene una tabla (p.ej. de un build más nuevo)"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+def has_search_index(conn) -> bool:
+    """Verificar si la base de datos tiene el índice FTS5 (cards_fts)"""
+    return has_table(conn, "cards_fts")
+
+def build_fts_query(q: str, column: Optional[str] = None, any_term: bool = False) -> Optional[str]:
+    """
+    Convertir texto libre en una expresión MATCH de FTS5
+    
+    Cada palabra se busca como prefijo ("pika" encuentra "Pikachu") y
+    se combinan con AND (o con OR si `any_term`, para búsquedas
+    ordenadas por relevancia). Retorna None si no quedan palabras útiles.
+    """
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return None
+    
+    expr = (" OR " if any_term else " ").join(f'"{token}"*' for token in tokens)
+    if column:
+        return f"{column} : ({expr})"
+    return expr
+
+def filter_conditions(game: Optional[str], rarity: Optional[str],
+                      min_price: Optional[float], max_price: Optional[float]) -> tuple:
+    """Condiciones WHERE (y sus parámetros) de /api/filter y /api/export"""
+    conditions = ""
+    params = []
+    
+    if game:
+        conditions += " AND game = ?"
+        params.append(game)
+    
+    if rarity:
+        conditions += " AND rarity = ?"
+        params.append(rarity)
+    
+    if min_price is not None:
+        conditions += " AND price_usd >= ?"
+        params.append(min_price)
+    
+    if max_price is not None:
+        conditions += " AND price_usd <= ?"
+        params.append(max_price)
+    
+    return conditions, params
+
+def encode_cursor(row) -> str:
+    """Cursor opaco con la última posición (name, card_id) de una página"""
+    raw = json.dumps([row['name'], row['card_id']], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decodificar un cursor de encode_cursor; 400 si no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name, card_id = json.loads(raw.decode("utf-8"))
+        if not isinstance(name, str) or not isinstance(card_id, str):
+            raise ValueError(cursor)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return name, card_id
+
+class TotalCache:
+    """LRU de totales por (versión de DB, consulta, parámetros)"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key) -> Optional[int]:
+        with self._lock:
+            total = self._entries.get(key)
+            if total is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return total
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def put(self, key, total: int):
+        with self._lock:
+            self._entries[key] = total
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+total_cache = TotalCache(TOTAL_CACHE_SIZE)
+
+def count_total(db, from_where: str, params: list, count: str) -> tuple:
+    """
+    Total de filas de `FROM ... WHERE ...` según el modo `count`
+    
+    - exact: COUNT(*) completo, cacheado por versión de la base de datos
+    - estimate: total cacheado si existe; si no, cuenta hasta COUNT_ESTIMATE_CAP
+    - none: no cuenta
+    
+    Retorna (total, total_exact).
+    """
+    key = (get_db_version(), from_where, tuple(params))
+    total = total_cache.get(key) if count != "none" else None
+    total_exact = True
+    
+    if total is None and count == "exact":
+        db.execute("SELECT COUNT(*)" + from_where, params)
+        total = db.fetchone()[0]
+        total_cache.put(key, total)
+    elif total is None and count == "estimate":
+        db.execute(f"SELECT COUNT(*) FROM (SELECT 1{from_where} LIMIT ?)",
+                   params + [COUNT_ESTIMATE_CAP + 1])
+        total = db.fetchone()[0]
+        if total > COUNT_ESTIMATE_CAP:
+            total = COUNT_ESTIMATE_CAP
+            total_exact = False
+        else:
+            total_cache.put(key, total)
+    elif total is None:
+        total_exact = False
+    
+    return total, total_exact
+
+def explain_query(db, query: str, params: list) -> List[str]:
+    """Plan de EXPLAIN QUERY PLAN como líneas indentadas según el árbol"""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in db.execute("EXPLAIN QUERY PLAN " + query, params).fetchall():
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+def fetch_page(db, query: str, params: list, limit: int, offset: int,
+               cursor: Optional[str], count: str, plans: Optional[dict] = None):
+    """
+    Ejecutar una consulta paginada por (name, card_id)
+    
+    `query` es un SELECT sobre `cards` con su WHERE, sin ORDER BY.
+    `count` decide el total (ver count_total); con none, usar next_cursor
+    para saber si hay más. Si se pasa `plans`, se llena con el plan de
+    las consultas de página y de conteo.
+    
+    Retorna (rows, next_cursor, total, total_exact).
+    """
+    from_where = query[query.index(" FROM "):]
+    total, total_exact = count_total(db, from_where, params, count)
+    
+    page_params = list(params)
+    
+    # Keyset: continuar después de la última carta vista
+    if cursor:
+        query += " AND (cards.name, cards.card_id) > (?, ?)"
+        page_params.extend(decode_cursor(cursor))
+        offset = 0
+    
+    # Una fila extra para saber si hay otra página
+    query += " ORDER BY cards.name, cards.card_id LIMIT ? OFFSET ?"
+    page_params.extend([limit + 1, offset])
+    
+    if plans is not None:
+        plans["page"] = explain_query(db, query, page_params)
+        plans["count"] = explain_query(db, "SELECT COUNT(*)" + from_where, params)
+    
+    db.execute(query, page_params)
+    rows = db.fetchall()
+    
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor, total, total_exact
+
+# ==================== SERIALIZATION ====================
+
+# Campos de Card en orden de respuesta y valores por defecto de columnas nulas
+CARD_FIELDS = tuple(Card.model_fields)
+CARD_DEFAULTS = {"type": "", "rarity": "Unknown", "image_url": ""}
+
+# Columnas que la paginación necesita aunque el cliente no las pida
+KEY_FIELDS = ("name", "card_id")
+
+def parse_fields(fields: Optional[str]) -> tuple:
+    """
+    Validar el parámetro `fields` (lista separada por comas)
+    
+    Retorna todos los campos de Card si no se especifica.
+    """
+    if not fields:
+        return CARD_FIELDS
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in CARD_FIELDS]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(CARD_FIELDS)}"
+        )
+    return requested
+
+def select_columns(fields: tuple) -> str:
+    """Lista de columnas del SELECT para los campos pedidos (más name/card_id)"""
+    columns = dict.fromkeys(fields + KEY_FIELDS)
+    return ", ".join(f"cards.{column}" for column in columns)
+
+def row_to_dict(row, fields: tuple = CARD_FIELDS) -> dict:
+    """Convertir fila de SQLite a dict con la forma de Card (solo `fields`)"""
+    card = {}
+    for field in fields:
+        value = row[field]
+        if value is None and field in CARD_DEFAULTS:
+            value = CARD_DEFAULTS[field]
+        card[field] = value
+    return card
+
+def rows_to_dicts(rows, fields: tuple = CARD_FIELDS) -> List[dict]:
+    """row_to_dict sobre un resultado, midiendo el tiempo de conversión"""
+    start = time.perf_counter()
+    cards = [row_to_dict(row, fields) for row in rows]
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.convert_seconds += time.perf_counter() - start
+    return cards
+
+def json_response(payload, status_code: int = 200) -> Response:
+    """
+    Serializar directamente a JSON, sin pasar por modelos Pydantic
+    
+    Usa orjson si está instalado.
+    """
+    start = time.perf_counter()
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.json_seconds += time.perf_counter() - start
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+# ==================== IN-MEMORY SNAPSHOTS ====================
+
+class DatabaseSnapshot:
+    """
+    Datos derivados de la base de datos que se mantienen en memoria
+    
+    Las subclases implementan load(); build() la ejecuta y recuerda la
+    versión del archivo. Si la base de datos cambia, refresh() construye
+    la versión nueva en segundo plano mientras se sigue respondiendo con
+    la anterior, y la sustituye de una vez al terminar.
+    """
+    
+    def __init__(self):
+        self.version = None
+        self.loaded = False
+        self._lock = threading.Lock()
+        # Como mucho un hilo de refresco pendiente por snapshot
+        self._refreshing = False
+        self._refreshing_lock = threading.Lock()
+    
+    def load(self):
+        raise NotImplementedError
+    
+    def build(self):
+        version = get_db_version()
+        self.load()
+        self.version = version
+        self.loaded = True
+    
+    def refresh(self):
+        """Reconstruir si la base de datos cambió (no hace nada si ya hay otra reconstrucción)"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if not self.loaded or get_db_version() != self.version:
+                self.build()
+        finally:
+            self._lock.release()
+    
+    def ensure_fresh(self):
+        """Construir en el primer uso; si está desactualizado, refrescar en segundo plano"""
+        if self.loaded and get_db_version() == self.version:
+            return
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.build()
+            return
+        # Un solo refresco a la vez (el de watch_database o uno lanzado aquí)
+        with self._refreshing_lock:
+            if self._refreshing or self._lock.locked():
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+    
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+# ==================== AUTOCOMPLETE INDEX ====================
+
+def normalize_name(text: str) -> str:
+    """Minúsculas, sin acentos y con separadores colapsados a un espacio"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+# Última lectura de load_ranked_names: (versión de la base de datos, nombres)
+_ranked_names = (None, None)
+_ranked_names_lock = threading.Lock()
+
+def load_ranked_names() -> dict:
+    """
+    Nombres distintos por juego (y de todos, clave None), precio más alto primero
+    
+    Base común de los índices de nombres en memoria: la posición en la
+    lista sirve de id y de criterio de desempate. Los índices se
+    reconstruyen juntos tras un cambio de base de datos, así que la
+    lectura se guarda por versión y la consulta se hace una sola vez.
+    """
+    global _ranked_names
+    version = get_db_version()
+    with _ranked_names_lock:
+        cached_version, names = _ranked_names
+        if names is None or cached_version != version:
+            names = query_ranked_names()
+            _ranked_names = (version, names)
+        return names
+
+def query_ranked_names() -> dict:
+    """Leer los nombres de la base de datos (sin la caché de load_ranked_names)"""
+    try:
+        rows = get_db_connection().execute('''
+            SELECT game, name, MAX(price_usd) AS price
+            FROM cards
+            GROUP BY game, name
+        ''').fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Error loading card names: {e}")
+        rows = []
+    
+    by_game = {}
+    best_price = {}
+    for row in rows:
+        price = row['price'] or 0.0
+        by_game.setdefault(row['game'], []).append((row['name'], price))
+        best_price[row['name']] = max(price, best_price.get(row['name'], 0.0))
+    
+    def ranked(entries) -> List[str]:
+        # Dos ordenaciones estables (nombre, luego precio) en vez de claves
+        # tupla: comparar str/float solos es más rápido y suelta antes el GIL
+        entries = sorted(entries, key=itemgetter(0))
+        entries.sort(key=lambda e: -e[1])
+        return [name for name, _ in entries]
+    
+    names = {game: ranked(entries) for game, entries in by_game.items()}
+    names[None] = ranked(best_price.items())
+    return names
+
+class SuggestionPartition:
+    """
+    Nombres de un juego (o de todos) listos para búsqueda por prefijo
+    
+    Los ids de nombre son su posición en el ranking (precio más alto
+    primero), así que los k mejores de un rango son los k ids menores.
+    """
+    
+    # Prefijos cortos tienen rangos enormes: se precalcula su top-k
+    PRECOMPUTED_PREFIX_LEN = 2
+    PRECOMPUTED_TOP_K = 50
+    
+    def __init__(self, ranked_names: List[str]):
+        self.names = ranked_names
+        
+        full_entries = []
+        word_entries = []
+        for name_id, name in enumerate(ranked_names):
+            key = normalize_name(name)
+            if not key:
+                continue
+            full_entries.append((key, name_id))
+            # Sufijos desde cada palabra (menos la primera): "white dragon", "dragon"
+            words = key.split(" ")
+            for i in range(1, len(words)):
+                word_entries.append((" ".join(words[i:]), name_id))
+        
+        # Los ids ya van en orden creciente y sort es estable: basta la clave
+        full_entries.sort(key=itemgetter(0))
+        word_entries.sort(key=itemgetter(0))
+        self.full_keys = [key for key, _ in full_entries]
+        self.full_ids = [name_id for _, name_id in full_entries]
+        self.word_keys = [key for key, _ in word_entries]
+        self.word_ids = [name_id for _, name_id in word_entries]
+        
+        self.full_top = self._precompute_top(self.full_keys, self.full_ids)
+        self.word_top = self._precompute_top(self.word_keys, self.word_ids)
+    
+    def _precompute_top(self, keys: List[str], ids: List[int]) -> dict:
+        top = {}
+        prefixes = set()
+        for key in keys:
+            for length in range(1, self.PRECOMPUTED_PREFIX_LEN + 1):
+                prefixes.add(key[:length])
+        for prefix in prefixes:
+            top[prefix] = self._scan(keys, ids, prefix, self.PRECOMPUTED_TOP_K)
+        return top
+    
+    @staticmethod
+    def _scan(keys: List[str], ids: List[int], prefix: str, k: int) -> List[int]:
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff", lo)
+        return heapq.nsmallest(k, set(ids[lo:hi]))
+    
+    def _lookup(self, keys, ids, top, prefix: str, k: int) -> List[int]:
+        if prefix in top and k <= self.PRECOMPUTED_TOP_K:
+            return top[prefix][:k]
+        return self._scan(keys, ids, prefix, k)
+    
+    def suggest(self, prefix: str, limit: int) -> List[str]:
+        """Prefijo del nombre primero, luego prefijo de palabras internas"""
+        ids = self._lookup(self.full_keys, self.full_ids, self.full_top, prefix, limit)
+        if len(ids) < limit:
+            seen = set(ids)
+            infix = self._lookup(self.word_keys, self.word_ids, self.word_top, prefix, limit + len(ids))
+            ids += [name_id for name_id in infix if name_id not in seen][:limit - len(ids)]
+        return [self.names[name_id] for name_id in ids]
+
+class SuggestionIndex(DatabaseSnapshot):
+    """
+    Índice en memoria para /api/autocomplete, particionado por juego
+    
+    Se construye al arrancar desde la tabla `cards` y se reconstruye solo
+    cuando cambia el archivo de base de datos.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.partitions = {}
+    
+    def load(self):
+        """Cargar nombres desde SQLite y reconstruir todas las particiones"""
+        ranked = load_ranked_names()
+        self.partitions = {game: SuggestionPartition(names) for game, names in ranked.items()}
+        logger.info(f"Autocomplete index built: {len(ranked[None])} names")
+    
+    def suggest(self, q: str, game: Optional[str], limit: int) -> List[str]:
+        self.ensure_fresh()
+        partition = self.partitions.get(game)
+        prefix = normalize_name(q)
+        if partition is None or not prefix:
+            return []
+        return partition.suggest(prefix, limit)
+
+suggestion_index = SuggestionIndex()
+
+# ==================== FUZZY INDEX ====================
+
+# Bytes no nulos de un bitmap: re los encuentra en C sin recorrer los ceros
+NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+def trigrams(key: str) -> set:
+    """Trigramas de un nombre normalizado (cada palabra con relleno, como pg_trgm)"""
+    grams = set()
+    for word in key.split(" "):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramPartition:
+    """
+    Bitmaps trigrama -> nombres para búsqueda aproximada top-k
+    
+    La similitud es Jaccard sobre los conjuntos de trigramas. Cada trigrama
+    guarda sus nombres como bitmap (un int, un bit por nombre) si aparece
+    en al menos 1/DENSE_FRACTION de ellos, o como array de ids si es raro;
+    los raros se pasan a bitmap al consultar. Así el trabajo por nombre lo
+    hacen las operaciones de ints en C, no bucles de Python:
+    
+    - conteo: los bitmaps de la consulta se suman en un contador bit a bit
+      (planes[i] tiene el bit i del solapamiento de cada nombre)
+    - niveles: se recorren los solapamientos o de mayor a menor y de cada
+      uno solo se extraen los nombres cuyo tamaño aún alcanza el umbral:
+      o / (|Q| + |N| - o) >= f  <=>  |N| <= o (1 + f) / f - |Q|
+    - top-k: el umbral sube a la similitud del k-ésimo resultado en cuanto
+      hay k, y con solapamiento o la similitud no pasa de o / |Q|, así que
+      se para en cuanto o / |Q| queda por debajo
+    """
+    
+    # Con len(ids) >= n / 64 el bitmap (n / 8 bytes) ocupa como mucho el doble que el array
+    DENSE_FRACTION = 64
+    
+    def __init__(self, ranked_names: List[str]):
+        self.names = ranked_names
+        self.nbytes = len(ranked_names) // 8 + 1
+        self.sizes = array("H")
+        postings = {}
+        for name_id, name in enumerate(ranked_names):
+            grams = trigrams(normalize_name(name))
+            self.sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, array("I")).append(name_id)
+        
+        dense_min = max(len(ranked_names) // self.DENSE_FRACTION, 1)
+        self.dense = {}
+        self.sparse = {}
+        for gram, ids in postings.items():
+            if len(ids) >= dense_min:
+                self.dense[gram] = self._bitmap(ids)
+            else:
+                self.sparse[gram] = ids
+        
+        # at_most[s]: nombres con como mucho s trigramas
+        by_size = {}
+        for name_id, size in enumerate(self.sizes):
+            by_size.setdefault(size, []).append(name_id)
+        self.at_most = []
+        mask = 0
+        for size in range(max(self.sizes, default=0) + 1):
+            if size in by_size:
+                mask |= self._bitmap(by_size[size])
+            self.at_most.append(mask)
+    
+    def _bitmap(self, ids) -> int:
+        buf = bytearray(self.nbytes)
+        for name_id in ids:
+            buf[name_id >> 3] |= 1 << (name_id & 7)
+        return int.from_bytes(buf, "little")
+    
+    def _ids(self, bitmap: int) -> List[int]:
+        data = bitmap.to_bytes(self.nbytes, "little")
+        ids = []
+        for match in NONZERO_BYTE.finditer(data):
+            index = match.start()
+            byte = data[index]
+            ids.extend(index * 8 + bit for bit in range(8) if byte >> bit & 1)
+        return ids
+    
+    def search(self, key: str, limit: int, threshold: float) -> List[tuple]:
+        """Hasta `limit` pares (nombre, similitud), de mayor a menor similitud"""
+        query = trigrams(key)
+        if not query:
+            return []
+        
+        size = len(query)
+        planes = []
+        for gram in query:
+            bitmap = self.dense.get(gram)
+            if bitmap is None:
+                ids = self.sparse.get(gram)
+                if ids is None:
+                    continue
+                bitmap = self._bitmap(ids)
+            carry = bitmap
+            for bit in range(len(planes)):
+                planes[bit], carry = planes[bit] ^ carry, planes[bit] & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+        
+        top = []  # min-heap de (similitud, -name_id): la raíz es el k-ésimo
+        floor = threshold
+        largest = len(self.at_most) - 1
+        for overlap in range(min(size, (1 << len(planes)) - 1), 0, -1):
+            if overlap / size < floor:
+                break
+            # El épsilon evita perder por redondeo un nombre que empata con `floor`
+            max_size = largest
+            if floor > 0:
+                max_size = min(math.floor(overlap * (1 + floor) / floor - size + 1e-9), largest)
+            if max_size < overlap:
+                continue
+            mask = self.at_most[max_size]
+            for bit, plane in enumerate(planes):
+                mask &= plane if overlap >> bit & 1 else ~plane
+                if not mask:
+                    break
+            if not mask:
+                continue
+            
+            for name_id in self._ids(mask):
+                similarity = overlap / (size + self.sizes[name_id] - overlap)
+                if similarity < floor:
+                    continue
+                item = (similarity, -name_id)
+                if len(top) < limit:
+                    heapq.heappush(top, item)
+                elif item > top[0]:
+                    heapq.heapreplace(top, item)
+                else:
+                    continue
+                if len(top) == limit:
+                    floor = max(floor, top[0][0])
+        
+        return [
+            (self.names[-neg_id], similarity)
+            for similarity, neg_id in sorted(top, reverse=True)
+        ]
+
+class FuzzyIndex(DatabaseSnapshot):
+    """Índice de trigramas de nombres para match=fuzzy, particionado por juego"""
+    
+    def __init__(self):
+        super().__init__()
+        self.partitions = {}
+    
+    def load(self):
+        ranked = load_ranked_names()
+        self.partitions = {game: TrigramPartition(names) for game, names in ranked.items()}
+        logger.info(f"Fuzzy index built: {len(ranked[None])} names")
+    
+    def search(self, q: str, game: Optional[str], limit: int,
+               threshold: float = FUZZY_THRESHOLD) -> List[tuple]:
+        self.ensure_fresh()
+        partition = self.partitions.get(game)
+        key = normalize_name(q)
+        if partition is None or not key:
+            return []
+        return partition.search(key, limit, threshold)
+
+fuzzy_index = FuzzyIndex()
+
+# ==================== CATALOG SUMMARY ====================
+
+PRICE_PERCENTILES = (25, 50, 75, 90, 99)
+
+class CatalogSummary(DatabaseSnapshot):
+    """
+    Conteos por juego, rarezas, sets y precios en memoria
+    
+    Se leen de las tablas summary_* que escribe el standardizer. Si la base
+    de datos es anterior a esas tablas se calculan una vez desde `cards`.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.games = {}
+        self.rarities = {}
+        self.sets = {}
+        self.total_cards = 0
+    
+    def load(self):
+        try:
+            conn = get_db_connection()
+            if has_table(conn, "summary_games"):
+                game_rows = conn.execute("SELECT * FROM summary_games").fetchall()
+                rarity_rows = conn.execute("SELECT game, rarity, card_count FROM summary_rarities").fetchall()
+                set_rows = conn.execute("SELECT game, set_name, card_count FROM summary_sets").fetchall()
+            else:
+                game_rows = conn.execute(
+                    "SELECT game, COUNT(*) AS card_count FROM cards GROUP BY game"
+                ).fetchall()
+                rarity_rows = conn.execute(
+                    "SELECT game, rarity, COUNT(*) FROM cards GROUP BY game, rarity"
+                ).fetchall()
+                set_rows = conn.execute(
+                    "SELECT game, set_name, COUNT(*) FROM cards GROUP BY game, set_name"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error loading catalog summary: {e}")
+            game_rows, rarity_rows, set_rows = [], [], []
+        
+        games = {}
+        for row in game_rows:
+            keys = row.keys()
+            prices = None
+            if "min_price" in keys:
+                prices = {
+                    "priced_cards": row["priced_count"],
+                    "min": row["min_price"],
+                    "max": row["max_price"],
+                    "avg": row["avg_price"],
+                    **{f"p{pct}": row[f"p{pct}"] for pct in PRICE_PERCENTILES if f"p{pct}" in keys}
+                }
+            games[row["game"]] = {"count": row["card_count"], "prices": prices}
+        
+        def grouped(rows) -> dict:
+            by_game = {}
+            for game, value, count in rows:
+                if value:
+                    by_game.setdefault(game, {})[value] = count
+            return by_game
+        
+        rarities = grouped(rarity_rows)
+        sets = grouped(set_rows)
+        total_cards = sum(entry["count"] for entry in games.values())
+        self.games, self.rarities, self.sets, self.total_cards = games, rarities, sets, total_cards
+    
+    def names(self, by_game: dict, game: Optional[str]) -> List[str]:
+        """Valores ordenados de un juego, o de todos si game es None"""
+        self.ensure_fresh()
+        if game:
+            return sorted(by_game.get(game, {}))
+        return sorted({value for values in by_game.values() for value in values})
+
+catalog_summary = CatalogSummary()
+
+# ==================== RESPONSE CACHE ====================
+
+# Endpoints de catálogo cuya respuesta solo depende de la base de datos
+CACHEABLE_PATHS = {"/api/games", "/api/stats", "/api/rarities", "/api/sets", "/api/search", "/api/filter"}
+# Endpoints que responden desde catalog_summary
+SUMMARY_PATHS = {"/api/games", "/api/stats", "/api/rarities", "/api/sets"}
+CACHEABLE_PREFIXES = ("/api/cards/",)
+CACHEABLE_STATUS = {200, 404}
+
+def response_snapshot(request: Request) -> Optional[DatabaseSnapshot]:
+    """Snapshot en memoria del que sale la respuesta, o None si sale de SQLite"""
+    path = request.url.path
+    if path in SUMMARY_PATHS:
+        return catalog_summary
+    if path == "/api/search" and request.query_params.get("match") == "fuzzy":
+        return fuzzy_index
+    return None
+
+def response_version(request: Request) -> Optional[tuple]:
+    """
+    Versión de la base de datos con la que se va a construir la respuesta
+    
+    Tras un cambio de archivo un snapshot sigue respondiendo con la versión
+    anterior mientras se reconstruye; su respuesta se identifica con esa
+    versión, no con la del archivo, para no guardarla (ni darle un ETag)
+    como si ya fuera la nueva.
+    """
+    snapshot = response_snapshot(request)
+    if snapshot is not None and snapshot.loaded:
+        return snapshot.version
+    return get_db_version()
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas serializadas, limitada por bytes y con TTL
+    
+    La clave incluye la versión de la base de datos (ver response_version),
+    así que regenerar tcg_unified.db invalida todo sin tener que vaciar nada.
+    """
+    
+    # Estimación del coste fijo de cada entrada además del cuerpo
+    ENTRY_OVERHEAD = 256
+    
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(request: Request) -> tuple:
+        """Versión de DB + ruta + parámetros ordenados (sin valores vacíos)"""
+        params = tuple(sorted(
+            (name, value) for name, value in request.query_params.multi_items() if value != ""
+        ))
+        return (response_version(request), request.url.path, params)
+    
+    def get(self, key) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, status_code: int, media_type: str, body: bytes):
+        cost = len(body) + self.ENTRY_OVERHEAD
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), (status_code, media_type, body), cost)
+            self.size += cost
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def _remove(self, key):
+        _, _, cost = self._entries.pop(key)
+        self.size -= cost
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL)
+
+def is_cacheable(request: Request) -> bool:
+    path = request.url.path
+    return request.method == "GET" and (
+        path in CACHEABLE_PATHS or path.startswith(CACHEABLE_PREFIXES)
+    )
+
+def conditional_headers(key: tuple) -> dict:
+    """
+    ETag, Last-Modified y Cache-Control para una clave de caché
+    
+    El ETag es fuerte: se deriva de la versión de la base de datos y los
+    parámetros de la petición, así que se conoce sin ejecutar el endpoint.
+    """
+    version = key[0]
+    etag = '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}"
+    }
+    if version is not None:
+        headers["Last-Modified"] = formatdate(version[1] / 1e9, usegmt=True)
+    return headers
+
+def is_not_modified(request: Request, headers: dict, exists: bool) -> bool:
+    """
+    Evaluar If-None-Match (prioritario) o If-Modified-Since
+    
+    `exists` indica que la respuesta ya se sabe que es un 200. Antes de
+    eso solo cuenta un ETag concreto (solo se envían con respuestas 200);
+    `*` e If-Modified-Since exigen que la representación exista (RFC 9110),
+    así que un 404 o un 400 no se convierten en 304.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Comparación débil (RFC 9110): nginx marca como W/ lo que comprime
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return headers["ETag"] in tags or (exists and "*" in tags)
+    
+    if not exists:
+        return False
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            modified = parsedate_to_datetime(headers["Last-Modified"])
+        except (TypeError, ValueError):
+            return False
+        return modified <= since
+    
+    return False
+
+@app.middleware("http")
+async def response_cache_middleware(request: Request, call_next):
+    """
+    Caché HTTP de los endpoints de catálogo
+    
+    Responde 304 a peticiones condicionales que siguen vigentes y, si no,
+    sirve el cuerpo desde la caché de respuestas.
+    """
+    if not is_cacheable(request):
+        return await call_next(request)
+    
+    key = response_cache.make_key(request)
+    validators = conditional_headers(key)
+    if is_not_modified(request, validators, exists=False):
+        return Response(status_code=304, headers=validators)
+    
+    cached = response_cache.get(key)
+    if cached is not None:
+        status_code, media_type, body = cached
+        if status_code == 200 and is_not_modified(request, validators, exists=True):
+            return Response(status_code=304, headers=validators)
+        headers = {"X-Cache": "HIT"}
+        if status_code == 200:
+            headers.update(validators)
+        return Response(content=body, status_code=status_code, media_type=media_type,
+                        headers=headers)
+    
+    response = await call_next(request)
+    if response.status_code not in CACHEABLE_STATUS:
+        return response
+    
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    media_type = response.headers.get("content-type", "application/json")
+    response_cache.put(key, response.status_code, media_type, body)
+    if response.status_code == 200 and is_not_modified(request, validators, exists=True):
+        return Response(status_code=304, headers=validators)
+    
+    headers = dict(response.headers)
+    headers["X-Cache"] = "MISS"
+    if response.status_code == 200:
+        headers.update(validators)
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+def server_timing(metrics: RequestMetrics, total: float) -> str:
+    """Cabecera Server-Timing con el desglose de una petición (milisegundos)"""
+    phases = metrics.sqlite_seconds + metrics.convert_seconds + metrics.json_seconds
+    entries = [
+        ("db", metrics.sqlite_seconds, f"{metrics.statements} queries, {metrics.rows} rows"),
+        ("convert", metrics.convert_seconds, "row conversion"),
+        ("json", metrics.json_seconds, "JSON encoding"),
+        ("app", max(total - phases, 0.0), "routing, validation, handler"),
+        ("total", total, None)
+    ]
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.3f}" + (f';desc="{desc}"' if desc else "")
+        for name, seconds, desc in entries
     )
 
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """
+    Registrar latencia, tiempo por fase y filas de cada petición
+    
+    Va por fuera de la caché, así que también mide las respuestas que
+    sirve la caché. En respuestas en streaming (/api/export) la latencia
+    llega hasta el primer byte.
+    
+    Con la cabecera `X-Debug-Timing: 1` la respuesta incluye el desglose
+    en `Server-Timing` (db, convert, json, app = routing, validación y
+    lógica del endpoint) y no se guarda en cachés intermedias.
+    """
+    route = route_template(request)
+    metrics = RequestMetrics(route)
+    token = current_metrics.set(metrics)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if request.headers.get("x-debug-timing") not in (None, "", "0"):
+            response.headers["Server-Timing"] = server_timing(metrics, time.perf_counter() - start)
+            response.headers["Cache-Control"] = "no-store"
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        current_metrics.reset(token)
+        request_latency.observe((route, request.method, str(status)), elapsed)
+        request_phase.observe((route, "sqlite"), metrics.sqlite_seconds)
+        request_phase.observe((route, "convert"), metrics.convert_seconds)
+        request_phase.observe((route, "json"), metrics.json_seconds)
+        request_rows.observe((route,), metrics.rows)
+
+# CORS para que el frontend pueda llamar desde cualquier lado. Se añade
+# después de los middlewares de caché y métricas para que sea el exterior:
+# así también llevan Access-Control-Allow-Origin los HIT y los 304 que
+# la caché responde sin pasar por el endpoint
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
 # ==================== ENDPOINTS ====================
 
+@app.on_event("startup")
+def build_indexes():
+    """Construir índices y resúmenes en memoria al arrancar"""
+    configure_slow_query_log()
+    suggestion_index.build()
+    fuzzy_index.build()
+    catalog_summary.build()
+
+def refresh_database_state():
+    """Pasar índices y cachés a la base de datos nueva tras un cambio de archivo"""
+    suggestion_index.refresh()
+    fuzzy_index.refresh()
+    catalog_summary.refresh()
+    # Las claves incluyen la versión: las entradas viejas ya no se pueden usar
+    response_cache.clear()
+    total_cache.clear()
+
+async def watch_database():
+    """
+    Detectar una base de datos nueva (inode/mtime/tamaño) y precalentar su estado
+    
+    La reconstrucción corre en el threadpool para no bloquear el event
+    loop. Un error en una vuelta se registra y la vigilancia sigue.
+    """
+    version = get_db_version()
+    while True:
+        await asyncio.sleep(DB_WATCH_INTERVAL)
+        try:
+            current = get_db_version()
+            if current == version:
+                continue
+            logger.info(f"Database changed ({DB_PATH}), switching to new version")
+            version = current
+            await run_in_threadpool(refresh_database_state)
+        except Exception as e:
+            logger.error(f"Error refreshing database state: {e}")
+
+@app.on_event("startup")
+async def start_database_watcher():
+    app.state.database_watcher = asyncio.create_task(watch_database())
+
+@app.on_event("shutdown")
+async def stop_database_watcher():
+    watcher = app.state.database_watcher
+    watcher.cancel()
+    try:
+        await watcher
+    except asyncio.CancelledError:
+        pass
+
+@app.on_event("startup")
+async def configure_threadpool():
+    """Limitar los hilos (y por tanto las conexiones) que atienden endpoints"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = DB_WORKER_THREADS
+
 @app.get("/health")
 async def health():
     """Health check"""
     return {"status": "healthy"}
 
-@app.get("/api/games")
-async def get_games():
-    """Obtener lista de juegos disponibles"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Contadores de la caché de respuestas (hits, misses, memoria)"""
+    return response_cache.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    lines = []
+    for histogram in (request_latency, request_phase, request_rows):
+        lines.extend(histogram.render())
+    
+    def metric(name: str, kind: str, help_text: str, samples: list):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{labels} {value}")
+    
+    pool = db_pool.stats()
+    metric("tcg_db_connections", "gauge", "Conexiones SQLite abiertas (stale: versión anterior de la DB)",
+           [('{state="current"}', pool["current"]), ('{state="stale"}', pool["stale"])])
+    
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    metric("tcg_threadpool_threads", "gauge", "Hilos del threadpool de endpoints síncronos",
+           [('{state="busy"}', limiter.borrowed_tokens), ('{state="limit"}', int(limiter.total_tokens))])
     
-    cursor.execute('''
-        SELECT DISTINCT game FROM cards ORDER BY game
-    ''')
+    cache = response_cache.stats()
+    totals = total_cache.stats()
+    metric("tcg_cache_hits_total", "counter", "Aciertos de caché",
+           [('{cache="response"}', cache["hits"]), ('{cache="total"}', totals["hits"])])
+    metric("tcg_cache_misses_total", "counter", "Fallos de caché",
+           [('{cache="response"}', cache["misses"]), ('{cache="total"}', totals["misses"])])
+    metric("tcg_cache_entries", "gauge", "Entradas en caché",
+           [('{cache="response"}', cache["entries"]), ('{cache="total"}', totals["entries"])])
+    metric("tcg_response_cache_bytes", "gauge", "Memoria usada por la caché de respuestas",
+           [("", cache["size_bytes"])])
+    metric("tcg_response_cache_evictions_total", "counter", "Entradas expulsadas de la caché de respuestas",
+           [("", cache["evictions"])])
     
-    games = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    metric("process_cpu_seconds_total", "counter", "Tiempo de CPU del proceso (usuario + sistema)",
+           [("", time.process_time())])
+    
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/games")
+def get_games():
+    """Obtener lista de juegos disponibles"""
+    catalog_summary.ensure_fresh()
+    games = sorted(catalog_summary.games)
     
     return {
         "games": games,
@@ -111,79 +1556,280 @@ async def get_games():
     }
 
 @app.get("/api/stats")
-async def get_stats():
-    """Obtener estadísticas de cartas por juego"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def get_stats():
+    """
+    Obtener estadísticas de cartas por juego
     
-    cursor.execute('''
-        SELECT game, COUNT(*) as count 
-        FROM cards 
-        GROUP BY game 
-        ORDER BY count DESC
-    ''')
+    Incluye precios (min/max/media/percentiles) si la base de datos tiene
+    las tablas de resumen del standardizer.
+    """
+    catalog_summary.ensure_fresh()
     
     stats = [
-        GameStats(game=row['game'], count=row['count'])
-        for row in cursor.fetchall()
+        GameStats(game=game, count=entry["count"], prices=entry["prices"])
+        for game, entry in sorted(
+            catalog_summary.games.items(), key=lambda item: -item[1]["count"]
+        )
     ]
     
-    cursor.execute('SELECT COUNT(*) FROM cards')
-    total = cursor.fetchone()[0]
+    return {
+        "total_cards": catalog_summary.total_cards,
+        "by_game": [s.dict() for s in stats]
+    }
+
+def price_bucket_sql() -> str:
+    """Expresión CASE que asigna a cada carta su tramo de FACET_PRICE_BUCKETS"""
+    cases = []
+    lower = 0
+    for upper in FACET_PRICE_BUCKETS:
+        cases.append(f"WHEN cards.price_usd < {upper} THEN '{lower}-{upper}'")
+        lower = upper
+    return f"CASE WHEN cards.price_usd IS NULL THEN NULL {' '.join(cases)} ELSE '{lower}+' END"
+
+def price_bucket_labels() -> List[str]:
+    """Etiquetas de los tramos de precio, de menor a mayor"""
+    bounds = (0,) + FACET_PRICE_BUCKETS
+    return [f"{lo}-{hi}" for lo, hi in zip(bounds, bounds[1:])] + [f"{bounds[-1]}+"]
+
+def count_facets(db, from_where: str, params: list) -> dict:
+    """
+    Conteos por game, rarity, set_name y tramo de precio de un resultado
+    
+    Un solo GROUP BY sobre la combinación de las cuatro columnas recorre
+    las coincidencias una vez; cada faceta se obtiene sumando en Python.
+    Las facetas reflejan también los filtros game/rarity aplicados.
+    """
+    db.execute(f"""
+        SELECT cards.game, cards.rarity, cards.set_name, {price_bucket_sql()}, COUNT(*)
+        {from_where}
+        GROUP BY 1, 2, 3, 4
+    """, params)
+    
+    totals = {"game": {}, "rarity": {}, "set_name": {}, "price": {}}
+    for game, rarity, set_name, bucket, n in db.fetchall():
+        for facet, value in (("game", game), ("rarity", rarity or CARD_DEFAULTS["rarity"]),
+                             ("set_name", set_name), ("price", bucket)):
+            if value is not None:
+                totals[facet][value] = totals[facet].get(value, 0) + n
     
-    conn.close()
+    def by_count(counts: dict) -> List[dict]:
+        top = heapq.nsmallest(FACET_MAX_VALUES, counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{"value": value, "count": n} for value, n in top]
     
     return {
-        "total_cards": total,
-        "by_game": [s.dict() for s in stats]
+        "game": by_count(totals["game"]),
+        "rarity": by_count(totals["rarity"]),
+        "set_name": by_count(totals["set_name"]),
+        # Los tramos de precio se devuelven en orden, no por conteo
+        "price": [
+            {"value": label, "count": totals["price"][label]}
+            for label in price_bucket_labels() if label in totals["price"]
+        ]
     }
 
-@app.get("/api/search")
-async def search_cards(
+def fuzzy_search(db, q: str, game: Optional[str], rarity: Optional[str], columns: str,
+                 limit: int, offset: int, count: str, facets: Optional[dict] = None) -> tuple:
+    """
+    Cartas cuyos nombres se parecen a `q`, por similitud y luego por card_id
+    
+    El índice de trigramas elige los nombres; SQLite solo trae sus cartas.
+    Con count=exact (o facetas) se toman los FUZZY_MAX_NAMES nombres más
+    parecidos y el total son todas sus cartas. Si no, solo los nombres
+    necesarios para llenar la página: cuantos menos se piden, antes sube
+    el umbral del índice y menos nombres hay que verificar.
+    
+    Retorna (rows, total, total_exact); si se pasa `facets`, se llena con
+    count_facets.
+    """
+    wanted = offset + limit
+    names = FUZZY_MAX_NAMES if count == "exact" or facets is not None else min(wanted, FUZZY_MAX_NAMES)
+    
+    while True:
+        matches = fuzzy_index.search(q, game, names)
+        complete = len(matches) < names or names == FUZZY_MAX_NAMES
+        if not matches:
+            if facets is not None:
+                facets.update(game=[], rarity=[], set_name=[], price=[])
+            return [], 0, True
+        rank = {name: position for position, (name, _) in enumerate(matches)}
+        
+        from_where = " FROM cards WHERE cards.name IN (SELECT value FROM json_each(?))"
+        params = [json.dumps(list(rank))]
+        if game:
+            from_where += " AND cards.game = ?"
+            params.append(game)
+        if rarity:
+            from_where += " AND cards.rarity = ?"
+            params.append(rarity)
+        
+        db.execute(f"SELECT {columns}{from_where}", params)
+        rows = db.fetchall()
+        # Cada nombre tiene al menos una carta, salvo que `rarity` las descarte todas
+        if len(rows) >= wanted or complete:
+            break
+        names = min(names * 2, FUZZY_MAX_NAMES)
+    
+    if facets is not None:
+        facets.update(count_facets(db, from_where, params))
+    
+    rows.sort(key=lambda row: (rank[row["name"]], row["card_id"]))
+    if complete:
+        total, total_exact = len(rows), True
+    elif count == "none":
+        total, total_exact = None, False
+    else:
+        total, total_exact = len(rows), False
+    return rows[offset:offset + limit], total, total_exact
+
+def ranked_search(db, fts_query: str, game: Optional[str], rarity: Optional[str], columns: str,
+                  limit: int, offset: int, count: str, facets: Optional[dict] = None) -> tuple:
+    """
+    Cartas que coinciden con `fts_query`, de más a menos relevante
+    
+    `ORDER BY rank` usa el bm25 con pesos que el standardizer guarda en
+    cards_fts. FTS5 calcula bm25 para todas las coincidencias y las ordena
+    antes de entregar la primera fila, así que el coste crece con el
+    número de coincidencias (palabras comunes como "dragon" son las más
+    caras); lo único que se corta en LIMIT es el JOIN con `cards`. Por eso
+    match=ranked no cuenta el total exacto salvo que se pida.
+    
+    Retorna (rows, total, total_exact); si se pasa `facets`, se llena con
+    count_facets.
+    """
+    from_where = """
+        FROM cards_fts
+        JOIN cards ON cards.rowid = cards_fts.rowid
+        WHERE cards_fts MATCH ?
+    """
+    params = [fts_query]
+    if game:
+        from_where += " AND cards.game = ?"
+        params.append(game)
+    if rarity:
+        from_where += " AND cards.rarity = ?"
+        params.append(rarity)
+    
+    total, total_exact = count_total(db, from_where, params, count)
+    if facets is not None:
+        facets.update(count_facets(db, from_where, params))
+    
+    db.execute(f"SELECT {columns}{from_where} ORDER BY cards_fts.rank LIMIT ? OFFSET ?",
+               params + [limit, offset])
+    return db.fetchall(), total, total_exact
+
+@app.get("/api/search", response_model=SearchResult)
+def search_cards(
     q: str = Query(..., min_length=1, description="Término de búsqueda"),
     game: Optional[str] = Query(None, description="Filtrar por juego"),
     rarity: Optional[str] = Query(None, description="Filtrar por rareza"),
+    match: str = Query("name", pattern="^(name|text|like|fuzzy|ranked)$", description="Modo de búsqueda: name, text, like, fuzzy o ranked"),
     limit: int = Query(20, ge=1, le=100, description="Límite de resultados"),
-    offset: int = Query(0, ge=0, description="Offset para paginación")
+    offset: int = Query(0, ge=0, description="Offset para paginación"),
+    cursor: Optional[str] = Query(None, description="Cursor de paginación (next_cursor de la página anterior)"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$", description="Cálculo del total: exact, estimate o none (por defecto exact; estimate con match=fuzzy o ranked)"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (p.ej. card_id,name,image_url)"),
+    facets: bool = Query(False, description="Incluir conteos por juego, rareza, set y tramo de precio")
 ):
     """
     Buscar cartas por nombre
     
+    Modos (`match`):
+    - name: prefijo por palabra sobre el nombre (índice FTS5)
+    - text: prefijo por palabra sobre name/effect/archetype/type (índice FTS5)
+    - like: substring con LIKE '%q%' (escaneo completo, modo anterior)
+    - fuzzy: nombres parecidos aunque tengan errores ("pikachoo"), ordenados
+      por similitud (índice de trigramas en memoria; pagina con `offset`)
+    - ranked: cualquiera de las palabras en name/effect/archetype/type,
+      ordenado por relevancia BM25 con más peso en el nombre (pagina con `offset`)
+    
+    Si la base de datos no tiene índice FTS5 se usa `like`.
+    
+    Paginación: `offset` o, para recorrer muchas páginas, `cursor` con el
+    `next_cursor` de la respuesta anterior (ignora `offset`).
+    
+    Total (`count`): exact (por defecto, cacheado), estimate (exacto hasta
+    1000, luego `total_exact=false`) o none (`total=null`). Con match=fuzzy
+    y match=ranked el valor por defecto es estimate. En fuzzy solo se buscan
+    los nombres de la página y `total` es un mínimo; exact cuenta las
+    cartas de los FUZZY_MAX_NAMES nombres más parecidos.
+    
+    Facetas (`facets=true`): `facets` trae, para todo el resultado (no solo
+    la página), listas {value, count} por game, rarity, set_name y price.
+    
     Ejemplos:
     - /api/search?q=dragon
     - /api/search?q=pikachu&game=pokemon
     - /api/search?q=rare&game=magic&rarity=rare
+    - /api/search?q=draw two&match=text
+    - /api/search?q=blue eyes white dargon&match=fuzzy
+    - /api/search?q=draw two cards&match=ranked
+    - /api/search?q=dragon&fields=card_id,name,image_url
+    - /api/search?q=dragon&facets=true
     """
+    fields = parse_fields(fields)
+    columns = select_columns(fields)
+    facet_counts = {} if facets else None
+    count = count or ("estimate" if match in ("fuzzy", "ranked") else "exact")
+    
+    def respond(rows, total, total_exact, next_cursor):
+        result = {
+            "total": total,
+            "total_exact": total_exact,
+            "cards": rows_to_dicts(rows, fields),
+            "next_cursor": next_cursor
+        }
+        if facets:
+            result["facets"] = facet_counts
+        return json_response(result)
+    
     conn = get_db_connection()
-    cursor = conn.cursor()
+    db = conn.cursor()
+    
+    if match == "fuzzy":
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor is not supported with match=fuzzy; use offset")
+        rows, total, total_exact = fuzzy_search(db, q, game, rarity, columns, limit, offset,
+                                                count, facet_counts)
+        return respond(rows, total, total_exact, None)
+    
+    fts_query = None
+    if match != "like" and has_search_index(conn):
+        fts_query = build_fts_query(q, column="name" if match == "name" else None,
+                                    any_term=match == "ranked")
+    
+    if match == "ranked" and fts_query:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor is not supported with match=ranked; use offset")
+        rows, total, total_exact = ranked_search(db, fts_query, game, rarity, columns,
+                                                 limit, offset, count, facet_counts)
+        return respond(rows, total, total_exact, None)
     
-    query = "SELECT * FROM cards WHERE name LIKE ?"
-    params = [f"%{q}%"]
+    if fts_query:
+        query = f"""
+            SELECT {columns} FROM cards_fts
+            JOIN cards ON cards.rowid = cards_fts.rowid
+            WHERE cards_fts MATCH ?
+        """
+        params = [fts_query]
+    else:
+        query = f"SELECT {columns} FROM cards WHERE name LIKE ?"
+        params = [f"%{q}%"]
     
     if game:
-        query += " AND game = ?"
+        query += " AND cards.game = ?"
         params.append(game)
     
     if rarity:
-        query += " AND rarity = ?"
+        query += " AND cards.rarity = ?"
         params.append(rarity)
     
-    # Contar total
-    count_query = query.replace("SELECT *", "SELECT COUNT(*)")
-    cursor.execute(count_query, params)
-    total = cursor.fetchone()[0]
-    
-    # Obtener resultados
-    query += " ORDER BY name LIMIT ? OFFSET ?"
-    params.extend([limit, offset])
-    
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    
-    cards = [row_to_card(row) for row in rows]
-    conn.close()
+    rows, next_cursor, total, total_exact = fetch_page(
+        db, query, params, limit, offset, cursor, count
+    )
+    if facets:
+        facet_counts.update(count_facets(db, query[query.index(" FROM "):], params))
     
-    return SearchResult(total=total, cards=cards)
+    return respond(rows, total, total_exact, next_cursor)
 
 @app.get("/api/autocomplete")
 async def autocomplete(
@@ -194,28 +1840,16 @@ async def autocomplete(
     """
     Autocompletar nombres de cartas
     
-    Retorna solo nombres para el autocomplete en el frontend
+    Retorna solo nombres para el autocomplete en el frontend. Se responde
+    desde el índice en memoria (sin tocar SQLite): primero nombres que
+    empiezan por `q`, luego nombres con una palabra que empieza por `q`,
+    cada grupo ordenado por precio.
     
     Ejemplos:
     - /api/autocomplete?q=dra&limit=5
     - /api/autocomplete?q=pik&game=pokemon&limit=10
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = "SELECT DISTINCT name FROM cards WHERE name LIKE ?"
-    params = [f"%{q}%"]
-    
-    if game:
-        query += " AND game = ?"
-        params.append(game)
-    
-    query += " ORDER BY name LIMIT ?"
-    params.append(limit)
-    
-    cursor.execute(query, params)
-    suggestions = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    suggestions = suggestion_index.suggest(q, game, limit)
     
     return {
         "query": q,
@@ -223,31 +1857,75 @@ async def autocomplete(
         "count": len(suggestions)
     }
 
+@app.post("/api/cards/batch")
+def get_cards_batch(
+    request: CardBatchRequest,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (p.ej. card_id,name,image_url)")
+):
+    """
+    Obtener muchas cartas por ID en una sola consulta
+    
+    Los IDs pueden ser de juegos distintos. Los resultados vienen en el
+    mismo orden que `card_ids`, con `found: false` para los que no existen.
+    
+    Ejemplo:
+    - POST /api/cards/batch  {"card_ids": ["OP01-024", "46986414", "base1-4"]}
+    """
+    fields = parse_fields(fields)
+    unique_ids = list(dict.fromkeys(request.card_ids))
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    # Un solo parámetro JSON: la sentencia preparada es la misma para cualquier N
+    cursor.execute(f"""
+        SELECT {select_columns(fields)} FROM cards
+        WHERE card_id IN (SELECT value FROM json_each(?))
+    """, (json.dumps(unique_ids),))
+    found = {row['card_id']: row_to_dict(row, fields) for row in cursor.fetchall()}
+    
+    results = [
+        {"card_id": card_id, "found": card_id in found, "card": found.get(card_id)}
+        for card_id in request.card_ids
+    ]
+    
+    return json_response({
+        "count": len(results),
+        "found": sum(1 for result in results if result["found"]),
+        "results": results
+    })
+
 @app.get("/api/cards/{card_id}", response_model=Card)
-async def get_card(card_id: str):
+def get_card(
+    card_id: str,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (p.ej. card_id,name,image_url)")
+):
     """
     Obtener carta por ID
     
     Ejemplo:
     - /api/cards/OP01-024
+    - /api/cards/OP01-024?fields=name,image_url
     """
+    fields = parse_fields(fields)
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT * FROM cards WHERE card_id = ?", (card_id,))
+    cursor.execute(f"SELECT {select_columns(fields)} FROM cards WHERE card_id = ?", (card_id,))
     row = cursor.fetchone()
-    conn.close()
     
     if not row:
         raise HTTPException(status_code=404, detail="Card not found")
     
-    return row_to_card(row)
+    return json_response(row_to_dict(row, fields))
 
 @app.get("/api/cards/by-name/{name}", response_model=List[Card])
-async def get_cards_by_name(
+def get_cards_by_name(
     name: str,
     game: Optional[str] = Query(None, description="Filtrar por juego"),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (p.ej. card_id,name,image_url)")
 ):
     """
     Obtener cartas por nombre exacto
@@ -255,10 +1933,12 @@ async def get_cards_by_name(
     Ejemplo:
     - /api/cards/by-name/Dragon?game=pokemon
     """
+    fields = parse_fields(fields)
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    query = "SELECT * FROM cards WHERE name LIKE ?"
+    query = f"SELECT {select_columns(fields)} FROM cards WHERE name LIKE ?"
     params = [f"%{name}%"]
     
     if game:
@@ -270,15 +1950,14 @@ async def get_cards_by_name(
     
     cursor.execute(query, params)
     rows = cursor.fetchall()
-    conn.close()
     
     if not rows:
         raise HTTPException(status_code=404, detail="No cards found")
     
-    return [row_to_card(row) for row in rows]
+    return json_response(rows_to_dicts(rows, fields))
 
 @app.get("/api/rarities")
-async def get_rarities(game: Optional[str] = Query(None)):
+def get_rarities(game: Optional[str] = Query(None)):
     """
     Obtener lista de rarezas disponibles
     
@@ -286,35 +1965,41 @@ async def get_rarities(game: Optional[str] = Query(None)):
     - /api/rarities
     - /api/rarities?game=pokemon
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = "SELECT DISTINCT rarity FROM cards WHERE rarity IS NOT NULL AND rarity != ''"
-    params = []
-    
-    if game:
-        query += " AND game = ?"
-        params.append(game)
-    
-    query += " ORDER BY rarity"
-    
-    cursor.execute(query, params)
-    rarities = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    rarities = catalog_summary.names(catalog_summary.rarities, game)
     
     return {
         "rarities": rarities,
         "count": len(rarities)
     }
 
+@app.get("/api/sets")
+def get_sets(game: Optional[str] = Query(None)):
+    """
+    Obtener lista de sets disponibles
+    
+    Ejemplos:
+    - /api/sets
+    - /api/sets?game=magic
+    """
+    sets = catalog_summary.names(catalog_summary.sets, game)
+    
+    return {
+        "sets": sets,
+        "count": len(sets)
+    }
+
 @app.get("/api/filter")
-async def filter_cards(
+def filter_cards(
     game: Optional[str] = Query(None),
     rarity: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Cursor de paginación (next_cursor de la página anterior)"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="Cálculo del total: exact, estimate o none"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (p.ej. card_id,name,image_url)"),
+    explain: bool = Query(False, description="Incluir el EXPLAIN QUERY PLAN de las consultas (depuración)")
 ):
     """
     Filtrar cartas por criterios múltiples
@@ -322,50 +2007,144 @@ async def filter_cards(
     Ejemplos:
     - /api/filter?game=pokemon&rarity=Rare
     - /api/filter?min_price=100&max_price=500
+    - /api/filter?game=magic&cursor=<next_cursor>
+    - /api/filter?game=magic&count=none
+    - /api/filter?game=pokemon&fields=card_id,name,price_usd
+    - /api/filter?game=magic&min_price=10&max_price=20&explain=true
     """
+    fields = parse_fields(fields)
+    
     conn = get_db_connection()
-    cursor = conn.cursor()
+    db = conn.cursor()
     
-    query = "SELECT * FROM cards WHERE 1=1"
-    params = []
+    conditions, params = filter_conditions(game, rarity, min_price, max_price)
+    query = f"SELECT {select_columns(fields)} FROM cards WHERE 1=1{conditions}"
     
-    if game:
-        query += " AND game = ?"
-        params.append(game)
+    plans = {} if explain else None
+    rows, next_cursor, total, total_exact = fetch_page(
+        db, query, params, limit, offset, cursor, count, plans
+    )
     
-    if rarity:
-        query += " AND rarity = ?"
-        params.append(rarity)
+    result = {
+        "total": total,
+        "total_exact": total_exact,
+        "limit": limit,
+        # Con cursor el offset no se usa: no devolverlo como si aplicara
+        "offset": None if cursor else offset,
+        "next_cursor": next_cursor,
+        "cards": rows_to_dicts(rows, fields)
+    }
+    if explain:
+        result["query_plan"] = plans
+    return json_response(result)
+
+# ==================== EXPORT ====================
+
+def accepts_gzip(request: Request) -> bool:
+    """¿Acepta el cliente Content-Encoding: gzip? (respeta q=0)"""
+    for entry in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = entry.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            q = params.strip().lower().removeprefix("q=")
+            try:
+                return not params or float(q) > 0
+            except ValueError:
+                return False
+    return False
+
+def encode_export_rows(rows, fields: tuple, fmt: str) -> bytes:
+    """Serializar un bloque de filas como NDJSON o CSV"""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(row_to_dict(row, fields).values() for row in rows)
+        return buffer.getvalue().encode("utf-8")
     
-    if min_price is not None:
-        query += " AND price_usd >= ?"
-        params.append(min_price)
+    if orjson is not None:
+        return b"".join(orjson.dumps(row_to_dict(row, fields)) + b"\n" for row in rows)
+    return "".join(
+        json.dumps(row_to_dict(row, fields), ensure_ascii=False, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+def iter_export(conn: sqlite3.Connection, query: str, params: list, fields: tuple,
+                fmt: str, gzip: bool):
+    """
+    Generar el cuerpo de /api/export bloque a bloque
     
-    if max_price is not None:
-        query += " AND price_usd <= ?"
-        params.append(max_price)
+    El cursor se lee con fetchmany, así que la memoria no depende del
+    tamaño del catálogo. La conexión se cierra al terminar o si el
+    cliente corta la descarga.
+    """
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip else None
+    
+    def encode(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
     
-    # Contar
-    count_query = query.replace("SELECT *", "SELECT COUNT(*)")
-    cursor.execute(count_query, params)
-    total = cursor.fetchone()[0]
+    try:
+        cursor = conn.execute(query, params)
+        if fmt == "csv":
+            header = io.StringIO()
+            csv.writer(header).writerow(fields)
+            yield encode(header.getvalue().encode("utf-8"))
+        
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            chunk = encode(encode_export_rows(rows, fields, fmt))
+            if chunk:
+                yield chunk
+        
+        if compressor:
+            yield compressor.flush()
+    finally:
+        conn.close()
+
+@app.get("/api/export")
+def export_cards(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Formato: ndjson o csv"),
+    game: Optional[str] = Query(None),
+    rarity: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    fields: Optional[str] = Query(None, description="Campos a exportar, separados por comas")
+):
+    """
+    Descargar el catálogo completo (o filtrado) en una sola respuesta
     
-    # Obtener resultados
-    query += " ORDER BY name LIMIT ? OFFSET ?"
-    params.extend([limit, offset])
+    Usa una conexión propia durante toda la descarga, así el resultado es
+    una foto consistente aunque se publique una base de datos nueva a
+    mitad de la transferencia. Se comprime con gzip si el cliente lo acepta.
     
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    Ejemplos:
+    - /api/export
+    - /api/export?format=csv&game=pokemon
+    - /api/export?game=magic&min_price=10&fields=card_id,name,price_usd
+    """
+    fields = parse_fields(fields)
+    conditions, params = filter_conditions(game, rarity, min_price, max_price)
+    query = f"SELECT {select_columns(fields)} FROM cards WHERE 1=1{conditions}"
     
-    cards = [row_to_card(row) for row in rows]
-    conn.close()
+    # Los bloques se generan en distintos hilos del threadpool
+    conn = open_read_connection(DB_PATH, check_same_thread=False)
+    gzip = accepts_gzip(request)
     
-    return {
-        "total": total,
-        "limit": limit,
-        "offset": offset,
-        "cards": [c.dict() for c in cards]
+    headers = {
+        "Content-Disposition": f'attachment; filename="tcg_cards.{format}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding"
     }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_export(conn, query, params, fields, format, gzip),
+        media_type=media_type,
+        headers=headers
+    )
 
 if __name__ == "__main__":
     import uvicorn
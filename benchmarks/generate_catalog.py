@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Generador de catálogos sintéticos
+Escribe one_piece.csv, yugioh.json, pokemon.json y magic.json con la
+forma exacta que leen los loaders de TCGStandardizer, de 10k a 1M+ cartas
+"""
+
+import argparse
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+# Reparto de cartas entre juegos (aproximado al catálogo real)
+GAME_SHARES = {
+    'one_piece': 0.10,
+    'yugioh': 0.30,
+    'pokemon': 0.25,
+    'magic': 0.35,
+}
+
+SYLLABLES = [
+    'ka', 'ri', 'zu', 'mo', 'ne', 'dra', 'gon', 'chu', 'pi', 'ta', 'lu', 'fy',
+    'zo', 'ro', 'ash', 'el', 'ven', 'tor', 'mir', 'sha', 'dow', 'blaz', 'fro',
+    'st', 'gar', 'on', 'ix', 'mal', 'thu', 'nder', 'cy', 'ber', 'kai', 'ser',
+]
+WORDS = [
+    'Dragon', 'Blue-Eyes', 'White', 'Dark', 'Magician', 'Knight', 'Goblin',
+    'Angel', 'Storm', 'Fire', 'Shadow', 'Ancient', 'Cyber', 'Elemental', 'Hero',
+    'Warrior', 'Wizard', 'Golem', 'Phoenix', 'Serpent', 'Titan', 'Spirit',
+    'Guardian', 'Beast', 'Lord', 'Queen', 'King', 'Soldier', 'Mage', 'Hunter',
+]
+EFFECT_PHRASES = [
+    'Draw two cards.', 'Destroy target creature.', 'Gain 3 life.',
+    'Add 1 card from your deck to your hand.', 'This card cannot be destroyed by battle.',
+    'Deal 2 damage to any target.', 'Search your deck for a basic Energy card.',
+    'Return target card to its owner\'s hand.', 'Special Summon this card from your hand.',
+    'Your opponent discards a card.', 'Flip a coin. If heads, this attack does 30 more damage.',
+]
+
+ONE_PIECE_RARITIES = ['C', 'UC', 'R', 'SR', 'SEC', 'L']
+ONE_PIECE_COLORS = ['Red', 'Green', 'Blue', 'Purple', 'Black', 'Yellow']
+ONE_PIECE_CREWS = ['Straw Hat Crew', 'Supernovas', 'Navy', 'Whitebeard Pirates', 'Animal Kingdom Pirates']
+YUGIOH_TYPES = ['Effect Monster', 'Normal Monster', 'Spell Card', 'Trap Card', 'Fusion Monster', 'XYZ Monster']
+YUGIOH_RARITIES = ['Common', 'Rare', 'Super Rare', 'Ultra Rare', 'Secret Rare']
+POKEMON_TYPES = ['Fire', 'Water', 'Grass', 'Lightning', 'Psychic', 'Fighting', 'Darkness', 'Metal']
+POKEMON_RARITIES = ['Common', 'Uncommon', 'Rare', 'Rare Holo', 'Rare Ultra']
+MAGIC_TYPES = ['Creature — Dragon', 'Creature — Human Wizard', 'Instant', 'Sorcery', 'Artifact', 'Enchantment']
+MAGIC_RARITIES = ['common', 'uncommon', 'rare', 'mythic']
+MAGIC_COLORS = ['W', 'U', 'B', 'R', 'G']
+
+
+class CatalogGenerator:
+    """
+    Cartas sintéticas reproducibles (misma semilla, mismos archivos)
+
+    Los nombres combinan palabras frecuentes con palabras inventadas,
+    así hay prefijos compartidos y nombres casi únicos como en el
+    catálogo real; algunas cartas repiten nombre (reimpresiones).
+    """
+
+    def __init__(self, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.names = []
+
+    def _word(self) -> str:
+        rng = self.rng
+        if rng.random() < 0.6:
+            return rng.choice(WORDS)
+        return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+    def name(self) -> str:
+        # Reimpresiones: ~10% reutiliza un nombre ya generado
+        if self.names and self.rng.random() < 0.1:
+            return self.rng.choice(self.names)
+        name = ' '.join(self._word() for _ in range(self.rng.randint(1, 4)))
+        if len(self.names) < 100000:
+            self.names.append(name)
+        return name
+
+    def effect(self) -> str:
+        return ' '.join(self.rng.sample(EFFECT_PHRASES, self.rng.randint(1, 3)))
+
+    def price(self) -> float:
+        # Cola larga: la mayoría baratas, unas pocas muy caras
+        return round(self.rng.lognormvariate(1.0, 1.4), 2)
+
+    def one_piece_row(self, i: int) -> List[str]:
+        rng = self.rng
+        set_code = f"OP{1 + i // 5000:02d}"
+        card_id = f"{set_code}-{i % 5000:04d}"
+        return [
+            f"{card_id}-{rng.randint(1, 3)}",           # 0: id
+            card_id,                                     # 1: card_id
+            rng.choice(ONE_PIECE_RARITIES),              # 2: rarity
+            ';'.join(rng.sample(ONE_PIECE_CREWS, rng.randint(1, 2))),  # 3: categorías
+            f"https://img.example/onepiece/{card_id}.png",  # 4: image_url
+            str(rng.randint(1, 10)),                     # 5: power
+            self.name(),                                 # 6: character_name
+            rng.choice(ONE_PIECE_COLORS),                # 7: color
+            set_code,                                    # 8: set
+            rng.choice(['', f"{rng.randint(1, 9) * 1000}.0"]),  # 9: cost
+            str(rng.randint(1, 3)),                      # 10: card_level
+            rng.choice(['', str(self.price())]),         # 11: price
+            self.effect(),                               # 12: ability
+            rng.choice(['', 'Trigger: Draw 1 card.']),   # 13: trigger
+            '0',                                         # 14: unknown
+        ]
+
+    def yugioh_card(self, i: int) -> Dict:
+        rng = self.rng
+        return {
+            'id': 10000000 + i,
+            'name': self.name(),
+            'type': rng.choice(YUGIOH_TYPES),
+            'desc': self.effect(),
+            'atk': rng.randrange(0, 4000, 100),
+            'def': rng.randrange(0, 4000, 100),
+            'level': rng.randint(1, 12),
+            'race': rng.choice(['Dragon', 'Spellcaster', 'Warrior', 'Fiend']),
+            'attribute': rng.choice(['LIGHT', 'DARK', 'FIRE', 'WATER']),
+            'archetype': rng.choice([None, None, 'Blue-Eyes', 'Dark Magician', 'Elemental HERO', 'Cyber Dragon']),
+            'card_sets': [
+                {
+                    'set_name': f"Legend Set {rng.randint(1, 300)}",
+                    'set_code': f"LS{rng.randint(1, 300):03d}-EN{rng.randint(0, 120):03d}",
+                    'set_rarity': rng.choice(YUGIOH_RARITIES),
+                }
+                for _ in range(rng.randint(1, 3))
+            ],
+            'card_images': [{'id': 10000000 + i, 'image_url': f"https://img.example/yugioh/{10000000 + i}.jpg"}],
+            'card_prices': [{
+                'cardmarket_price': str(self.price()),
+                'tcgplayer_price': str(self.price()),
+                'ebay_price': str(self.price()),
+            }],
+        }
+
+    def pokemon_card(self, i: int) -> Dict:
+        rng = self.rng
+        set_id = f"sv{1 + i // 250}"
+        card = {
+            'id': f"{set_id}-{i % 250 + 1}",
+            'name': self.name(),
+            'supertype': 'Pokémon',
+            'types': [rng.choice(POKEMON_TYPES)],
+            'hp': str(rng.randrange(30, 340, 10)),
+            'flavorText': self.effect(),
+            'rarity': rng.choice(POKEMON_RARITIES),
+            'set': {'id': set_id, 'name': f"Scarlet Expansion {1 + i // 250}"},
+            'images': {
+                'small': f"https://img.example/pokemon/{set_id}/{i}.png",
+                'large': f"https://img.example/pokemon/{set_id}/{i}_hires.png",
+            },
+            'attacks': [
+                {
+                    'name': self._word(),
+                    'cost': [rng.choice(POKEMON_TYPES) for _ in range(rng.randint(1, 3))],
+                    'damage': str(rng.randrange(10, 200, 10)),
+                    'text': rng.choice(EFFECT_PHRASES),
+                }
+                for _ in range(rng.randint(1, 2))
+            ],
+            'weaknesses': [{'type': rng.choice(POKEMON_TYPES), 'value': '×2'}],
+        }
+        if rng.random() < 0.3:
+            card['resistances'] = [{'type': rng.choice(POKEMON_TYPES), 'value': '-30'}]
+        # No todas las cartas tienen precio holofoil
+        if rng.random() < 0.8:
+            card['tcgplayer'] = {'prices': {'holofoil': {'low': self.price(), 'market': self.price()}}}
+        return card
+
+    def magic_card(self, i: int) -> Dict:
+        rng = self.rng
+        colors = sorted(rng.sample(MAGIC_COLORS, rng.randint(0, 2)))
+        type_line = rng.choice(MAGIC_TYPES)
+        creature = type_line.startswith('Creature')
+        return {
+            'id': f"{i:08x}-{rng.getrandbits(16):04x}-4000-8000-{rng.getrandbits(48):012x}",
+            'name': self.name(),
+            'type_line': type_line,
+            'oracle_text': self.effect(),
+            'mana_cost': ''.join(f"{{{c}}}" for c in colors) or '{2}',
+            'cmc': float(rng.randint(0, 8)),
+            'power': str(rng.randint(0, 8)) if creature else None,
+            'toughness': str(rng.randint(1, 8)) if creature else None,
+            'colors': colors,
+            'color_identity': colors,
+            'rarity': rng.choice(MAGIC_RARITIES),
+            'set_name': f"Edition {rng.randint(1, 400)}",
+            'image_uris': {
+                'small': f"https://img.example/magic/{i}_small.jpg",
+                'normal': f"https://img.example/magic/{i}.jpg",
+            },
+            'prices': {'usd': rng.choice([None, str(self.price()), str(self.price())])},
+        }
+
+
+def split_counts(total: int) -> Dict[str, int]:
+    """Cartas por juego según GAME_SHARES (la suma es exactamente `total`)"""
+    counts = {game: int(total * share) for game, share in GAME_SHARES.items()}
+    counts['magic'] += total - sum(counts.values())
+    return counts
+
+
+def write_json_list(path: Path, cards: Iterator[Dict], wrap_data: bool):
+    """Lista JSON con un elemento por línea, opcionalmente dentro de {"data": ...}"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"data": [\n' if wrap_data else '[\n')
+        first = True
+        for card in cards:
+            if not first:
+                f.write(',\n')
+            f.write(json.dumps(card, ensure_ascii=False))
+            first = False
+        f.write('\n]}\n' if wrap_data else '\n]\n')
+
+
+def generate(out_dir: Path, total: int, seed: int = 1, json_lines: bool = False) -> Dict[str, int]:
+    """
+    Escribir los cuatro archivos fuente en out_dir
+
+    Yu-Gi-Oh y Pokémon usan {"data": [...]} como sus APIs; Magic una lista
+    como el bulk de Scryfall. Con json_lines las tres son listas con una
+    carta por línea (la forma que load_parallel puede trocear).
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    generator = CatalogGenerator(seed)
+    counts = split_counts(total)
+
+    with open(out_dir / 'one_piece.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            'id', 'card_id', 'rarity', 'categories', 'image_url', 'power', 'name',
+            'color', 'set', 'cost', 'level', 'price', 'effect', 'trigger', 'extra'
+        ])
+        for i in range(counts['one_piece']):
+            writer.writerow(generator.one_piece_row(i))
+
+    write_json_list(out_dir / 'yugioh.json',
+                    (generator.yugioh_card(i) for i in range(counts['yugioh'])),
+                    wrap_data=not json_lines)
+    write_json_list(out_dir / 'pokemon.json',
+                    (generator.pokemon_card(i) for i in range(counts['pokemon'])),
+                    wrap_data=not json_lines)
+    write_json_list(out_dir / 'magic.json',
+                    (generator.magic_card(i) for i in range(counts['magic'])),
+                    wrap_data=False)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar un catálogo sintético de cartas")
+    parser.add_argument('--cards', type=int, default=10000, help='Total de cartas (por defecto 10000)')
+    parser.add_argument('--out', default='bench_data', help='Directorio de salida')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla (mismos archivos para la misma semilla)')
+    parser.add_argument('--json-lines', action='store_true',
+                        help='Listas JSON sin {"data": ...}, una carta por línea')
+    args = parser.parse_args()
+
+    counts = generate(Path(args.out), args.cards, args.seed, args.json_lines)
+    for game, count in counts.items():
+        print(f"  • {game:10s} {count:8d} cartas")
+    print(f"✅ Catálogo sintético en {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
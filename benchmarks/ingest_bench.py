@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de ingesta del standardizer
+Mide cartas/segundo y memoria pico de cada parser, loader y etapa de
+escritura sobre un catálogo sintético, con un modo de perfil de CPU
+"""
+
+import argparse
+import cProfile
+import csv
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'db_standardizer'))
+sys.path.insert(0, str(BENCH_DIR))
+
+from standardize_tcg import TCGStandardizer  # noqa: E402
+from generate_catalog import generate  # noqa: E402
+
+SOURCES = {
+    'one_piece': 'one_piece.csv',
+    'yugioh': 'yugioh.json',
+    'pokemon': 'pokemon.json',
+    'magic': 'magic.json',
+}
+
+
+class Stage:
+    """
+    Una etapa medible
+
+    `run` devuelve cuántos elementos procesó (cartas, filas o precios);
+    `setup` prepara el estado y no entra en la medición.
+    """
+
+    def __init__(self, name: str, kind: str, run: Callable[[], int],
+                 setup: Optional[Callable[[], None]] = None, note: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.run = run
+        self.setup = setup
+        self.note = note
+
+
+class IngestBench:
+    """Etapas de ingesta sobre los archivos de `data_dir`"""
+
+    def __init__(self, data_dir: Path, work_dir: Path):
+        self.data_dir = data_dir
+        self.work_dir = work_dir
+        self.parser = TCGStandardizer(setup_db=False)
+
+        # Entradas ya en memoria para medir solo los parsers
+        with open(data_dir / SOURCES['one_piece'], newline='', encoding='utf-8') as f:
+            self.one_piece_rows = list(csv.reader(f))[1:]
+        self.raw = {}
+        for game in ('yugioh', 'pokemon', 'magic'):
+            with open(data_dir / SOURCES[game], encoding='utf-8') as f:
+                data = json.load(f)
+            self.raw[game] = data.get('data', data) if isinstance(data, dict) else data
+        self.prices = self._collect_prices()
+
+        self.cards = self._all_cards()
+
+    def _path(self, game: str) -> str:
+        return str(self.data_dir / SOURCES[game])
+
+    def _collect_prices(self) -> List:
+        """Precios tal como llegan en las fuentes (texto, número, vacío o None)"""
+        prices = [row[11] for row in self.one_piece_rows if len(row) > 11]
+        for card in self.raw['yugioh']:
+            prices.extend(p.get('tcgplayer_price') for p in card.get('card_prices', []))
+        for card in self.raw['pokemon']:
+            prices.append(card.get('tcgplayer', {}).get('prices', {}).get('holofoil', {}).get('market'))
+        prices.extend(card.get('prices', {}).get('usd') for card in self.raw['magic'])
+        return prices
+
+    def _all_cards(self) -> List[Dict]:
+        cards = self.parser.load_one_piece_csv(self._path('one_piece'))
+        for game in ('yugioh', 'pokemon', 'magic'):
+            cards.extend(getattr(self.parser, f"load_{game}_json")(self._path(game)))
+        return cards
+
+    def _parse_all(self, parse: Callable, items: List) -> int:
+        return sum(1 for item in items if parse(item) is not None)
+
+    def _fresh_db(self, name: str) -> TCGStandardizer:
+        path = self.work_dir / name
+        if path.exists():
+            path.unlink()
+        return TCGStandardizer(db_path=str(path))
+
+    def stages(self) -> List[Stage]:
+        p = self.parser
+        stages = [
+            # Micro: solo la función de parseo sobre datos ya leídos
+            Stage('parse_one_piece_row', 'micro',
+                  lambda: self._parse_all(p._parse_one_piece_row, self.one_piece_rows)),
+            Stage('parse_yugioh_json', 'micro',
+                  lambda: self._parse_all(p._parse_yugioh_json, self.raw['yugioh'])),
+            Stage('parse_pokemon_json', 'micro',
+                  lambda: self._parse_all(p._parse_pokemon_json, self.raw['pokemon'])),
+            Stage('parse_magic_json', 'micro',
+                  lambda: self._parse_all(p._parse_magic_json, self.raw['magic'])),
+            Stage('parse_price', 'micro',
+                  lambda: len([p._parse_price(value) for value in self.prices])),
+        ]
+
+        # Macro: archivo -> cartas, completo y en streaming
+        for game in SOURCES:
+            if game == 'one_piece':
+                load, stream = p.load_one_piece_csv, p.iter_one_piece_csv
+            else:
+                load, stream = getattr(p, f"load_{game}_json"), getattr(p, f"iter_{game}_json")
+            path = self._path(game)
+            stages.append(Stage(f"load_{game}", 'macro', lambda load=load, path=path: len(load(path))))
+            stages.append(Stage(f"stream_{game}", 'macro',
+                                lambda stream=stream, path=path: sum(1 for _ in stream(path))))
+
+        sources = [(self._path(game), game) for game in SOURCES]
+        stages.append(Stage('load_parallel', 'macro', lambda: sum(1 for _ in p.load_parallel(sources)),
+                            note='memoria pico solo del proceso principal'))
+
+        # Escritura: cartas ya parseadas -> SQLite
+        holder = {}
+
+        def fresh(name):
+            def setup():
+                holder['db'] = self._fresh_db(name)
+            return setup
+
+        def populated(name):
+            def setup():
+                holder['db'] = self._fresh_db(name)
+                holder['db'].save_to_database(self.cards, bulk=True)
+            return setup
+
+        def save():
+            holder['db'].save_to_database(self.cards)
+            return len(self.cards)
+
+        def save_bulk():
+            holder['db'].save_to_database(self.cards, bulk=True)
+            return len(self.cards)
+
+        def sync():
+            holder['db'].sync_to_database(self.cards)
+            return len(self.cards)
+
+        def search_index():
+            holder['db'].build_search_index()
+            return len(self.cards)
+
+        def summaries():
+            holder['db'].build_summary_tables()
+            return len(self.cards)
+
+        stages += [
+            Stage('save_to_database', 'write', save, setup=fresh('save.db')),
+            Stage('save_to_database_bulk', 'write', save_bulk, setup=fresh('bulk.db')),
+            Stage('sync_to_database_unchanged', 'write', sync, setup=populated('sync.db')),
+            Stage('build_search_index', 'write', search_index, setup=populated('fts.db')),
+            Stage('build_summary_tables', 'write', summaries, setup=populated('summary.db')),
+        ]
+        return stages
+
+
+def measure(stage: Stage, repeat: int, memory: bool) -> Dict:
+    """Mejor tiempo de `repeat` corridas y, en otra corrida, memoria pico con tracemalloc"""
+    best = None
+    items = 0
+    for _ in range(repeat):
+        if stage.setup:
+            stage.setup()
+        start = time.perf_counter()
+        items = stage.run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    result = {
+        'kind': stage.kind,
+        'items': items,
+        'seconds': round(best, 4),
+        'items_per_second': round(items / best, 1) if best else None,
+    }
+
+    # tracemalloc ralentiza la ejecución: la memoria se mide aparte
+    if memory:
+        if stage.setup:
+            stage.setup()
+        tracemalloc.start()
+        stage.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_memory_mb'] = round(peak / (1024 * 1024), 2)
+
+    if stage.note:
+        result['note'] = stage.note
+    return result
+
+
+def profile(stage: Stage, top: int, output_dir: Path):
+    """Perfil de CPU de una etapa: funciones más costosas y quién las llama"""
+    if stage.setup:
+        stage.setup()
+    profiler = cProfile.Profile()
+    profiler.runcall(stage.run)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    dump = output_dir / f"{stage.name}.prof"
+    profiler.dump_stats(dump)
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).strip_dirs()
+    stats.sort_stats('cumulative').print_stats(top)
+    stats.sort_stats('tottime').print_stats(top)
+    stats.print_callers(top // 2 or 1)
+    print(f"\n{'=' * 80}\n🔥 {stage.name}\n{'=' * 80}")
+    print(stream.getvalue())
+    print(f"📄 Perfil completo: {dump} (snakeviz / python -m pstats)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de ingesta del TCG standardizer")
+    parser.add_argument('--cards', type=int, default=20000, help='Tamaño del catálogo sintético')
+    parser.add_argument('--data', default=None,
+                        help='Directorio con los archivos fuente (si no, se genera uno temporal)')
+    parser.add_argument('--stages', nargs='+', default=None, metavar='NAME',
+                        help='Etapas a medir (por defecto todas)')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas por etapa (se toma la mejor)')
+    parser.add_argument('--no-memory', action='store_true', help='No medir memoria pico')
+    parser.add_argument('--profile', action='store_true',
+                        help='Perfil de CPU (cProfile) de las etapas en vez de medir throughput')
+    parser.add_argument('--top', type=int, default=25, help='Funciones a mostrar en el perfil')
+    parser.add_argument('--output', default=None, help='Archivo JSON de resultados')
+    args = parser.parse_args()
+
+    logging.getLogger('standardize_tcg').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix='tcg-ingest-') as tmp:
+        work_dir = Path(tmp)
+        data_dir = Path(args.data) if args.data else work_dir / 'data'
+        if not args.data:
+            print(f"📦 Generando catálogo sintético de {args.cards} cartas...")
+            generate(data_dir, args.cards)
+
+        bench = IngestBench(data_dir, work_dir)
+        stages = bench.stages()
+        names = [stage.name for stage in stages]
+        if args.stages:
+            unknown = [name for name in args.stages if name not in names]
+            if unknown:
+                parser.error(f"Etapas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(names)})")
+            stages = [stage for stage in stages if stage.name in args.stages]
+
+        if args.profile:
+            for stage in stages:
+                profile(stage, args.top, BENCH_DIR / 'results' / 'profiles')
+            return
+
+        results = {}
+        for stage in stages:
+            result = measure(stage, args.repeat, memory=not args.no_memory)
+            results[stage.name] = result
+            memory = f"  pico {result['peak_memory_mb']:8.2f} MB" if 'peak_memory_mb' in result else ''
+            print(f"  {stage.name:28s} {result['items_per_second']:12.0f} /s  "
+                  f"{result['seconds']:8.3f} s{memory}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'cards': len(bench.cards),
+            'data': str(Path(args.data).resolve()) if args.data else f"synthetic ({args.cards})",
+            'repeat': args.repeat,
+            'cpu_count': os.cpu_count(),
+            'python': sys.version.split()[0],
+        },
+        'stages': results,
+    }
+    output = Path(args.output or BENCH_DIR / 'results' / f"ingest-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\n📄 Resultados: {output}")
+
+
+if __name__ == "__main__":
+    main()
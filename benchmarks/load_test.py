@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del API
+Lanza peticiones concurrentes contra cada endpoint de main.py y guarda
+throughput y latencias p50/p95/p99 en JSON para comparar entre versiones
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'TCG-API' / 'tcg-backend'
+
+# Peticiones por escenario cuando no se indica --requests
+DEFAULT_REQUESTS = 500
+# /api/export devuelve catálogos enteros: menos repeticiones
+EXPORT_REQUESTS = 10
+
+Request = Tuple[str, str, Optional[bytes]]  # (método, ruta con query, cuerpo)
+
+
+class Samples:
+    """Valores reales de la base de datos para construir peticiones variadas"""
+
+    def __init__(self, db_path: str, size: int = 2000, seed: int = 1):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        rows = conn.execute(
+            'SELECT card_id, name, game, rarity FROM cards ORDER BY random() LIMIT ?', (size,)
+        ).fetchall()
+        conn.close()
+        if not rows:
+            raise SystemExit(f"La base de datos {db_path} no tiene cartas")
+
+        self.rng = random.Random(seed)
+        self.card_ids = [row[0] for row in rows]
+        self.names = [row[1] for row in rows]
+        self.games = sorted({row[2] for row in rows})
+        self.game_rarities = sorted({(row[2], row[3]) for row in rows if row[3]})
+        self.words = sorted({word for name in self.names for word in name.split() if len(word) > 2})
+
+    def pick(self, values):
+        return self.rng.choice(values)
+
+    def typo(self, text: str) -> str:
+        """Cambiar dos letras de sitio (para match=fuzzy)"""
+        if len(text) < 4:
+            return text
+        i = self.rng.randrange(1, len(text) - 2)
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def get(path: str, **params) -> Request:
+    params = {key: value for key, value in params.items() if value is not None}
+    return ('GET', path + ('?' + urlencode(params) if params else ''), None)
+
+
+def build_scenarios(s: Samples) -> Dict[str, Callable[[], Request]]:
+    """Un generador de peticiones por escenario (endpoint + variante)"""
+    def game_rarity():
+        return s.pick(s.game_rarities)
+
+    return {
+        'health': lambda: get('/health'),
+        'games': lambda: get('/api/games'),
+        'stats': lambda: get('/api/stats'),
+        'rarities': lambda: get('/api/rarities', game=s.pick(s.games)),
+        'sets': lambda: get('/api/sets', game=s.pick(s.games)),
+        'search_name': lambda: get('/api/search', q=s.pick(s.words)[:5]),
+        'search_text': lambda: get('/api/search', q=s.pick(s.words), match='text', count='estimate'),
+        'search_like': lambda: get('/api/search', q=s.pick(s.words), match='like', game=s.pick(s.games)),
+        'search_fuzzy': lambda: get('/api/search', q=s.typo(s.pick(s.names)), match='fuzzy'),
+        'search_ranked': lambda: get('/api/search', q=f"{s.pick(s.words)} {s.pick(s.words)}", match='ranked'),
+        'search_facets': lambda: get('/api/search', q=s.pick(s.words)[:4], facets='true'),
+        'autocomplete': lambda: get('/api/autocomplete', q=s.pick(s.names)[:s.rng.randint(1, 4)]),
+        'card_by_id': lambda: get('/api/cards/' + quote(s.pick(s.card_ids), safe='')),
+        'card_by_name': lambda: get('/api/cards/by-name/' + quote(s.pick(s.names), safe='')),
+        'cards_batch': lambda: (
+            'POST', '/api/cards/batch',
+            json.dumps({'card_ids': s.rng.sample(s.card_ids, min(50, len(s.card_ids)))}).encode()
+        ),
+        'filter_game': lambda: get('/api/filter', game=s.pick(s.games), offset=s.rng.randrange(0, 200, 20)),
+        'filter_game_rarity': lambda: get('/api/filter', **dict(zip(('game', 'rarity'), game_rarity()))),
+        'filter_price': lambda: get('/api/filter', game=s.pick(s.games),
+                                    min_price=s.rng.randint(0, 20), max_price=s.rng.randint(21, 200)),
+        'export_game': lambda: get('/api/export', game=s.pick(s.games)),
+        'metrics': lambda: get('/metrics'),
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Percentil por rango más cercano"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Client:
+    """Una conexión keep-alive por hilo (no se mide el handshake TCP de cada petición)"""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def request(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, int, Optional[str]]:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {'Accept-Encoding': 'gzip'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        try:
+            conn.request(method, self.prefix + path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            return response.status, len(payload), response.getheader('X-Cache')
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.local.conn = None
+            raise
+
+
+def run_scenario(client: Client, make_request: Callable[[], Request], requests: int,
+                 concurrency: int) -> Dict:
+    """Ejecutar `requests` peticiones con `concurrency` hilos y resumir"""
+    # Las peticiones se generan antes para no medir el muestreo
+    planned = [make_request() for _ in range(requests)]
+    latencies = []
+    errors = 0
+    statuses = {}
+    cache_hits = 0
+    total_bytes = 0
+    lock = threading.Lock()
+
+    def worker(req: Request):
+        nonlocal errors, cache_hits, total_bytes
+        start = time.perf_counter()
+        try:
+            status, size, cache = client.request(*req)
+        except (OSError, http.client.HTTPException):
+            status, size, cache = None, 0, None
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status is None or status >= 500:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+            cache_hits += cache == 'HIT'
+            total_bytes += size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, planned))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'statuses': statuses,
+        'seconds': round(wall, 3),
+        'throughput_rps': round(requests / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        'cache_hit_ratio': round(cache_hits / requests, 4) if requests else 0.0,
+        'bytes': total_bytes,
+    }
+
+
+def check_cors(base_url: str, timeout: float) -> List[str]:
+    """
+    Comprobar Access-Control-Allow-Origin en las respuestas de la caché
+
+    Pide el mismo recurso tres veces (MISS, HIT y condicional con su ETag,
+    que debe dar 304): las dos últimas las responde la caché sin llegar al
+    endpoint. Devuelve los problemas encontrados.
+    """
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    # Parámetro único para que la primera petición no salga de la caché
+    path = parts.path.rstrip('/') + '/api/games?' + urlencode({'cors_check': time.time_ns()})
+    headers = {'Origin': 'http://cors-check.example'}
+    problems = []
+    etag = None
+    for expected, extra in (('MISS', {}), ('HIT', {}), ('304', None)):
+        if extra is None:
+            if etag is None:
+                problems.append("sin ETag: no se pudo probar el 304")
+                break
+            extra = {'If-None-Match': etag}
+        conn.request('GET', path, headers={**headers, **extra})
+        response = conn.getresponse()
+        response.read()
+        etag = etag or response.getheader('ETag')
+        got = '304' if response.status == 304 else response.getheader('X-Cache')
+        if got != expected:
+            problems.append(f"se esperaba {expected} y llegó {got or response.status}")
+        elif response.getheader('Access-Control-Allow-Origin') is None:
+            problems.append(f"{expected} sin Access-Control-Allow-Origin")
+    conn.close()
+    return problems
+
+
+def start_server(db_path: str, port: int) -> subprocess.Popen:
+    """Levantar uvicorn con TCG_DB_PATH apuntando a la base de datos a medir"""
+    env = dict(os.environ, TCG_DB_PATH=str(Path(db_path).resolve()))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("El servidor no arrancó en 60 s")
+
+
+def compare(results: Dict, baseline_path: str, max_regression: float) -> List[str]:
+    """Escenarios cuyo p95 empeoró más de `max_regression` respecto a otra corrida"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['scenarios']
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name, {}).get('latency_ms', {}).get('p95')
+        after = result['latency_ms']['p95']
+        if before and after and after > before * (1 + max_regression):
+            regressions.append(f"{name}: p95 {before} ms -> {after} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del TCG API")
+    parser.add_argument('--db', required=True, help='Base de datos construida (para muestrear consultas)')
+    parser.add_argument('--base-url', default=None,
+                        help='API ya en marcha (si no, se levanta uvicorn con --db)')
+    parser.add_argument('--port', type=int, default=8765, help='Puerto del servidor levantado por el script')
+    parser.add_argument('--concurrency', type=int, default=8, help='Peticiones simultáneas')
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='Peticiones por escenario')
+    parser.add_argument('--scenarios', nargs='+', default=None, metavar='NAME',
+                        help='Escenarios a ejecutar (por defecto todos)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Timeout por petición (s)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help='Archivo JSON de resultados')
+    parser.add_argument('--baseline', default=None, help='Resultados anteriores para comparar')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Empeoramiento de p95 tolerado frente a --baseline (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    samples = Samples(args.db, seed=args.seed)
+    scenarios = build_scenarios(samples)
+    selected = args.scenarios or list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)} (disponibles: {', '.join(scenarios)})")
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = start_server(args.db, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    client = Client(base_url, args.timeout)
+    results = {}
+    try:
+        cors_problems = check_cors(base_url, args.timeout)
+        for line in cors_problems:
+            print(f"⚠️  CORS: {line}")
+        for name in selected:
+            requests = min(args.requests, EXPORT_REQUESTS) if name.startswith('export') else args.requests
+            result = run_scenario(client, scenarios[name], requests, args.concurrency)
+            results[name] = result
+            latency = result['latency_ms']
+            print(f"  {name:20s} {result['throughput_rps']:9.1f} req/s  "
+                  f"p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms  "
+                  f"errores {result['errors']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'base_url': base_url,
+            'db': str(Path(args.db).resolve()),
+            'db_bytes': os.path.getsize(args.db),
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'seed': args.seed,
+            'cors_problems': cors_problems,
+        },
+        'scenarios': results,
+    }
+    output = Path(args.output or f"benchmarks/results/load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\n📄 Resultados: {output}")
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        for line in regressions:
+            print(f"⚠️  Regresión {line}")
+    if regressions or cors_problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
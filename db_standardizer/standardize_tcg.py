@@ -5,13 +5,27 @@ Convierte CSV/JSON de todos los TCGs a un formato unificado
 Crea: SQLite + CSV exportable
 """
 
+import argparse
+import hashlib
+import itertools
 import json
 import csv
+import os
+import re
 import sqlite3
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Callable
 from pathlib import Path
 from datetime import datetime
+from multiprocessing import Pool
 import logging
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow solo hace falta para exportar a Parquet/Arrow
+    pa = None
+    pq = None
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,25 +34,265 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class JSONArrayStream:
+    """
+    Lector incremental de listas JSON
+    
+    Decodifica un elemento a la vez con JSONDecoder.raw_decode sobre un
+    buffer que se rellena por bloques, así la memoria depende del tamaño
+    de una carta y no del archivo.
+    """
+    
+    CHUNK_SIZE = 1 << 20
+    _WHITESPACE = re.compile(r'\s*')
+    _DELIMITERS = frozenset(',:]} \t\r\n')
+    
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def _peek(self) -> str:
+        """Siguiente carácter no blanco ('' al final del archivo)"""
+        while True:
+            self.pos = self._WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+    
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at JSON stream, found {found!r}")
+        self.pos += 1
+    
+    def _value(self) -> Any:
+        """Decodificar el siguiente valor completo, leyendo más si hace falta"""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # Un número cortado por el bloque ("2" de "2.5") parece completo:
+                # solo se acepta si le sigue un delimitador
+                if self.eof or (end < len(self.buf) and self.buf[end] in self._DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+    
+    def _iter_array(self) -> Iterator[Any]:
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self._value()
+            char = self._peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+    
+    def items(self, key: str = 'data') -> Iterator[Any]:
+        """
+        Elementos de `[...]` o de `{"<key>": [...], ...}`
+        
+        Un objeto sin `key` se trata como un único elemento.
+        """
+        if self._peek() == '[':
+            yield from self._iter_array()
+            return
+        
+        self._expect('{')
+        members = {}
+        if self._peek() == '}':
+            self.pos += 1
+        else:
+            while True:
+                name = self._value()
+                self._expect(':')
+                if name == key and self._peek() == '[':
+                    yield from self._iter_array()
+                    return
+                members[name] = self._value()
+                char = self._peek()
+                self.pos += 1
+                if char == '}':
+                    break
+                if char != ',':
+                    raise ValueError(f"Expected ',' or '}}' in JSON object, found {char!r}")
+        yield members
+
+
+class CSVExportWriter:
+    """Escribe filas de cards en CSV a medida que llegan"""
+    
+    extension = 'csv'
+    
+    def __init__(self, path: Path, columns: List[str], types: List[str]):
+        self.f = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(columns)
+    
+    def write(self, rows: List[tuple]):
+        self.writer.writerows(rows)
+    
+    def close(self):
+        self.f.close()
+
+
+class NDJSONExportWriter:
+    """Escribe una carta por línea como objeto JSON"""
+    
+    extension = 'ndjson'
+    
+    def __init__(self, path: Path, columns: List[str], types: List[str]):
+        self.f = open(path, 'w', encoding='utf-8')
+        self.columns = columns
+    
+    def write(self, rows: List[tuple]):
+        self.f.writelines(
+            json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+    
+    def close(self):
+        self.f.close()
+
+
+class ParquetExportWriter:
+    """
+    Escribe Parquet por row groups (un row group por bloque de filas)
+    
+    El esquema se fija a partir de los tipos declarados en SQLite, así
+    todos los bloques y particiones comparten tipos aunque un bloque
+    tenga una columna entera en NULL.
+    """
+    
+    extension = 'parquet'
+    
+    ARROW_TYPES = {
+        'INTEGER': 'int64',
+        'REAL': 'float64',
+    }
+    
+    def __init__(self, path: Path, columns: List[str], types: List[str]):
+        if pa is None:
+            raise RuntimeError("Exportar a Parquet/Arrow requiere pyarrow (pip install pyarrow)")
+        self.schema = pa.schema([
+            (column, pa.type_for_alias(self.ARROW_TYPES.get(sql_type.upper(), 'string')))
+            for column, sql_type in zip(columns, types)
+        ])
+        self.writer = self._open(path)
+    
+    def _open(self, path: Path):
+        return pq.ParquetWriter(path, self.schema)
+    
+    def write(self, rows: List[tuple]):
+        arrays = [
+            pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), self.schema)
+        ]
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+    
+    def close(self):
+        self.writer.close()
+
+
+class ArrowExportWriter(ParquetExportWriter):
+    """Escribe el formato de archivo Arrow IPC (Feather v2)"""
+    
+    extension = 'arrow'
+    
+    def _open(self, path: Path):
+        return pa.ipc.new_file(path, self.schema)
+
+
 class TCGStandardizer:
     """Standardiza todos los formatos de TCG a un esquema unificado"""
     
-    def __init__(self, db_path: str = "tcg_unified.db"):
+    # Tablas de resumen precalculadas que el API carga en memoria
+    SUMMARY_TABLES = ('summary_games', 'summary_rarities', 'summary_sets')
+    PRICE_PERCENTILES = (25, 50, 75, 90, 99)
+    
+    # Índices secundarios de `cards` (el modo bulk los crea después de la carga)
+    # Pensados para /api/filter: igualdades (game, rarity) primero, luego el
+    # orden de paginación (name, card_id) y price_usd al final, para que el
+    # rango de precio se evalúe en el índice sin ordenar después
+    INDEXES = {
+        'idx_name_price': 'cards(name, card_id, price_usd)',
+        'idx_game_name': 'cards(game, name, card_id, price_usd)',
+        'idx_game_rarity_name': 'cards(game, rarity, name, card_id, price_usd)',
+        'idx_rarity_name': 'cards(rarity, name, card_id, price_usd)',
+        # Rangos de precio selectivos y sus COUNT(*) (skip-scan si no hay game)
+        'idx_game_price': 'cards(game, price_usd)',
+        'idx_set': 'cards(set_name)',
+    }
+    
+    # Índices de versiones anteriores, cubiertos por los compuestos
+    OBSOLETE_INDEXES = ('idx_game', 'idx_name', 'idx_rarity')
+    
+    # Columnas que escribe save_to_database, en orden
+    CARD_COLUMNS = (
+        'card_id', 'game', 'name', 'image_url', 'type', 'effect', 'rarity',
+        'set_name', 'price_usd', 'power', 'toughness', 'cost', 'color', 'hp',
+        'abilities', 'weaknesses', 'resistances', 'archetype', 'source_game'
+    )
+    
+    # Columnas indexadas en cards_fts, en orden, y su peso en bm25 (name pesa más)
+    FTS_COLUMNS = ('name', 'effect', 'archetype', 'type')
+    FTS_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+    
+    BULK_BATCH_SIZE = 10000
+    
+    # Fuentes conocidas para la carga en paralelo: tipo -> (formato, parser)
+    SOURCE_PARSERS = {
+        'one_piece': ('csv', '_parse_one_piece_row'),
+        'yugioh': ('json', '_parse_yugioh_json'),
+        'pokemon': ('json', '_parse_pokemon_json'),
+        'magic': ('json', '_parse_magic_json'),
+    }
+    
+    # Archivos más grandes que esto se reparten en trozos entre workers
+    PARALLEL_CHUNK_BYTES = 32 * 1024 * 1024
+    
+    # Exportación: filas leídas del cursor por bloque y escritor por formato
+    EXPORT_CHUNK_SIZE = 5000
+    EXPORT_WRITERS = {
+        'csv': CSVExportWriter,
+        'ndjson': NDJSONExportWriter,
+        'parquet': ParquetExportWriter,
+        'arrow': ArrowExportWriter,
+    }
+    
+    def __init__(self, db_path: str = "tcg_unified.db", setup_db: bool = True,
+                 incremental: bool = False):
         self.db_path = db_path
         self.cards = []
-        self.init_db()
+        if incremental:
+            self.ensure_db()
+        elif setup_db:
+            self.init_db()
     
-    def init_db(self):
-        """Crear tabla unificada en SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            DROP TABLE IF EXISTS cards
-        ''')
-        
+    def _create_cards_table(self, cursor):
         cursor.execute('''
-            CREATE TABLE cards (
+            CREATE TABLE IF NOT EXISTS cards (
                 card_id TEXT PRIMARY KEY,
                 game TEXT NOT NULL,
                 name TEXT NOT NULL,
@@ -61,49 +315,113 @@ class TCGStandardizer:
                 
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 source_game TEXT,
-                source_file TEXT
+                source_file TEXT,
+                content_hash TEXT
             )
         ''')
+    
+    def ensure_db(self):
+        """Crear la tabla si no existe, sin borrar datos (modo incremental)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        self._create_cards_table(cursor)
+        
+        # Bases de datos anteriores al modo incremental no tienen content_hash
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(cards)')}
+        if 'content_hash' not in columns:
+            cursor.execute('ALTER TABLE cards ADD COLUMN content_hash TEXT')
+        
+        self.create_indexes(cursor)
+        
+        conn.commit()
+        conn.close()
+        logger.info(f"✅ Database ready (incremental): {self.db_path}")
+    
+    def init_db(self):
+        """Crear tabla unificada en SQLite"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            DROP TABLE IF EXISTS cards_fts
+        ''')
+        
+        for table in self.SUMMARY_TABLES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        
+        cursor.execute('''
+            DROP TABLE IF EXISTS cards
+        ''')
+        
+        self._create_cards_table(cursor)
         
         # Crear índices
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_game ON cards(game)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_name ON cards(name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rarity ON cards(rarity)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_set ON cards(set_name)')
+        self.create_indexes(cursor)
         
         conn.commit()
         conn.close()
         logger.info(f"✅ Database initialized: {self.db_path}")
     
+    def create_indexes(self, cursor):
+        """Crear los índices secundarios de `cards`"""
+        for name in self.OBSOLETE_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        for name, target in self.INDEXES.items():
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+    
+    def drop_indexes(self, cursor):
+        """Eliminar los índices secundarios de `cards`"""
+        for name in self.INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+    
     # ==================== ONE PIECE ====================
     
     def load_one_piece_csv(self, csv_file: str) -> List[Dict]:
         """Cargar y parsear CSV de One Piece"""
         logger.info(f"📥 Cargando One Piece CSV: {csv_file}")
         
-        cards = []
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                for i, row in enumerate(reader):
-                    if i == 0:  # Skip header if exists
-                        if row[0] == 'id':
-                            continue
-                    
-                    if len(row) < 10:
-                        logger.warning(f"Fila incompleta: {row}")
-                        continue
-                    
-                    card = self._parse_one_piece_row(row)
-                    if card:
-                        cards.append(card)
-            
+            cards = list(self._iter_one_piece_rows(csv_file))
             logger.info(f"✅ Loaded {len(cards)} One Piece cards")
             return cards
         except Exception as e:
             logger.error(f"❌ Error loading One Piece CSV: {e}")
             return []
     
+    def iter_one_piece_csv(self, csv_file: str) -> Iterator[Dict]:
+        """Versión incremental de load_one_piece_csv"""
+        logger.info(f"📥 Leyendo One Piece CSV (streaming): {csv_file}")
+        
+        count = 0
+        try:
+            for card in self._iter_one_piece_rows(csv_file):
+                count += 1
+                yield card
+        except Exception as e:
+            logger.error(f"❌ Error streaming One Piece CSV: {e}")
+        
+        logger.info(f"✅ Streamed {count} One Piece cards")
+    
+    def _iter_one_piece_rows(self, csv_file: str) -> Iterator[Dict]:
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            yield from self._parse_one_piece_lines(f)
+    
+    def _parse_one_piece_lines(self, lines: Iterable[str], has_header: bool = True) -> Iterator[Dict]:
+        reader = csv.reader(lines)
+        for i, row in enumerate(reader):
+            if i == 0 and has_header:  # Skip header if exists
+                if row and row[0] == 'id':
+                    continue
+            
+            if len(row) < 10:
+                logger.warning(f"Fila incompleta: {row}")
+                continue
+            
+            card = self._parse_one_piece_row(row)
+            if card:
+                yield card
+    
     def _parse_one_piece_row(self, row: List) -> Optional[Dict]:
         """Parsear fila CSV de One Piece"""
         try:
@@ -166,6 +484,136 @@ class TCGStandardizer:
             logger.error(f"Error parsing One Piece row: {e}")
             return None
     
+    # ==================== STREAMING ====================
+    
+    def _stream_json(self, json_file: str, parser: Callable[[Dict], Optional[Dict]],
+                     label: str) -> Iterator[Dict]:
+        """Parsear un JSON carta por carta (memoria constante)"""
+        logger.info(f"📥 Leyendo {label} JSON (streaming): {json_file}")
+        
+        count = 0
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                for raw_card in JSONArrayStream(f).items('data'):
+                    card = parser(raw_card)
+                    if card:
+                        count += 1
+                        yield card
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Error streaming {label} JSON: {e}")
+        
+        logger.info(f"✅ Streamed {count} {label} cards")
+    
+    def iter_yugioh_json(self, json_file: str) -> Iterator[Dict]:
+        """Versión incremental de load_yugioh_json"""
+        return self._stream_json(json_file, self._parse_yugioh_json, 'Yu-Gi-Oh')
+    
+    def iter_pokemon_json(self, json_file: str) -> Iterator[Dict]:
+        """Versión incremental de load_pokemon_json"""
+        return self._stream_json(json_file, self._parse_pokemon_json, 'Pokémon')
+    
+    def iter_magic_json(self, json_file: str) -> Iterator[Dict]:
+        """Versión incremental de load_magic_json"""
+        return self._stream_json(json_file, self._parse_magic_json, 'Magic')
+    
+    # ==================== PARALLEL ====================
+    
+    @staticmethod
+    def _is_line_delimited_json(json_file: str) -> bool:
+        """¿Es una lista JSON con un elemento por línea (como los bulk de Scryfall)?"""
+        with open(json_file, 'rb') as f:
+            first = f.readline().strip()
+            second = f.readline().strip().rstrip(b',')
+        if first != b'[' or not second.startswith(b'{'):
+            return False
+        try:
+            json.loads(second)
+            return True
+        except ValueError:
+            return False
+    
+    def plan_parallel_tasks(self, sources: List[tuple], chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> List[tuple]:
+        """
+        Repartir las fuentes en tareas (kind, path, start, end)
+        
+        El CSV y los JSON con un elemento por línea se cortan en rangos de
+        bytes alineados a inicio de línea; el resto va entero (end=None) a
+        un solo worker. Los campos CSV entre comillas con saltos de línea
+        no pueden cruzar un corte: si la fuente los tiene, subir chunk_bytes.
+        """
+        tasks = []
+        for path, kind in sources:
+            size = os.path.getsize(path)
+            fmt, _ = self.SOURCE_PARSERS[kind]
+            splittable = fmt == 'csv' or self._is_line_delimited_json(path)
+            if not splittable or size <= chunk_bytes:
+                tasks.append((kind, path, 0, None))
+                continue
+            for start in range(0, size, chunk_bytes):
+                tasks.append((kind, path, start, min(start + chunk_bytes, size)))
+        return tasks
+    
+    @staticmethod
+    def _iter_line_range(path: str, start: int, end: int) -> Iterator[bytes]:
+        """Líneas que empiezan dentro de [start, end)"""
+        with open(path, 'rb') as f:
+            if start > 0:
+                # Descartar la línea que empezó en el trozo anterior
+                f.seek(start - 1)
+                f.readline()
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                yield line
+    
+    def parse_task(self, task: tuple) -> List[Dict]:
+        """Parsear una tarea de plan_parallel_tasks (se ejecuta en un worker)"""
+        kind, path, start, end = task
+        fmt, parser_name = self.SOURCE_PARSERS[kind]
+        parser = getattr(self, parser_name)
+        
+        if end is None:
+            if fmt == 'csv':
+                return list(self._iter_one_piece_rows(path))
+            return list(self._stream_json(path, parser, kind))
+        
+        lines = self._iter_line_range(path, start, end)
+        if fmt == 'csv':
+            text_lines = (line.decode('utf-8') for line in lines)
+            return list(self._parse_one_piece_lines(text_lines, has_header=start == 0))
+        
+        cards = []
+        for line in lines:
+            line = line.strip()
+            if line in (b'', b'[', b']'):
+                continue
+            line = line.rstrip(b',')
+            if line.endswith(b'}]'):
+                line = line[:-1]
+            card = parser(json.loads(line))
+            if card:
+                cards.append(card)
+        return cards
+    
+    def load_parallel(self, sources: List[tuple], workers: Optional[int] = None,
+                      chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> Iterator[Dict]:
+        """
+        Parsear varias fuentes a la vez en un pool de procesos
+        
+        `sources` es una lista de (path, kind). Las cartas se entregan en el
+        orden de las tareas (igual que la carga secuencial, así la última
+        carta con un card_id repetido sigue ganando) para que un solo
+        escritor (save_to_database) las guarde mientras los workers parsean.
+        """
+        tasks = self.plan_parallel_tasks(sources, chunk_bytes)
+        workers = workers or os.cpu_count() or 1
+        logger.info(f"⚡ Parseando {len(tasks)} tareas con {workers} procesos")
+        
+        with Pool(processes=workers) as pool:
+            for cards in pool.imap(_parse_task_worker, tasks):
+                yield from cards
+    
     # ==================== YU-GI-OH ====================
     
     def load_yugioh_json(self, json_file: str) -> List[Dict]:
@@ -394,91 +842,505 @@ class TCGStandardizer:
         except (ValueError, TypeError):
             return None
     
-    def save_to_database(self, cards: List[Dict]):
-        """Guardar cartas en SQLite"""
-        logger.info(f"💾 Guardando {len(cards)} cartas en base de datos...")
+    def _insert_sql(self) -> str:
+        columns = self.CARD_COLUMNS + ('content_hash',)
+        placeholders = ', '.join('?' * len(columns))
+        return f"INSERT OR REPLACE INTO cards ({', '.join(columns)}) VALUES ({placeholders})"
+    
+    def _upsert_sql(self) -> str:
+        """Como _insert_sql pero actualiza en sitio (conserva el rowid que usa cards_fts)"""
+        columns = self.CARD_COLUMNS + ('content_hash',)
+        placeholders = ', '.join('?' * len(columns))
+        updates = ', '.join(f'{column} = excluded.{column}' for column in columns[1:])
+        return (
+            f"INSERT INTO cards ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(card_id) DO UPDATE SET {updates}"
+        )
+    
+    def _card_values(self, card: Dict) -> tuple:
+        """Valores de CARD_COLUMNS más el hash de su contenido"""
+        values = tuple(card.get(column) for column in self.CARD_COLUMNS)
+        content = json.dumps(values, ensure_ascii=False, default=str)
+        return values + (hashlib.sha1(content.encode('utf-8')).hexdigest(),)
+    
+    def save_to_database(self, cards: Iterable[Dict], bulk: bool = False,
+                         batch_size: int = BULK_BATCH_SIZE):
+        """
+        Guardar cartas en SQLite (acepta una lista o un iterador de cartas)
+        
+        Con bulk=True inserta con executemany por lotes, sin journal ni
+        fsync durante la carga, y crea los índices al final. Pensado para
+        reconstrucciones completas: si el proceso muere a mitad de la carga
+        la base de datos queda inservible y hay que regenerarla.
+        """
+        logger.info(f"💾 Guardando cartas en base de datos{' (bulk)' if bulk else ''}...")
+        started = time.perf_counter()
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        insert_sql = self._insert_sql()
         
-        for card in cards:
+        saved = 0
+        if bulk:
+            cursor.execute('PRAGMA journal_mode = OFF')
+            cursor.execute('PRAGMA synchronous = OFF')
+            cursor.execute('PRAGMA cache_size = -262144')
+            cursor.execute('PRAGMA temp_store = MEMORY')
+            self.drop_indexes(cursor)
+            
+            cards = iter(cards)
+            while True:
+                batch = [self._card_values(card) for card in itertools.islice(cards, batch_size)]
+                if not batch:
+                    break
+                try:
+                    cursor.executemany(insert_sql, batch)
+                    saved += len(batch)
+                except Exception:
+                    # Reintentar fila a fila para registrar solo las cartas con error
+                    saved += self._insert_rows(cursor, insert_sql, batch)
+            
+            logger.info("🗂️  Creando índices...")
+            self.create_indexes(cursor)
+            conn.commit()
+            cursor.execute('PRAGMA journal_mode = DELETE')
+        else:
+            saved = self._insert_rows(cursor, insert_sql, (self._card_values(card) for card in cards))
+            conn.commit()
+        
+        conn.close()
+        
+        elapsed = time.perf_counter() - started
+        rate = saved / elapsed if elapsed > 0 else 0.0
+        logger.info(f"✅ {saved} cards saved to database in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+    
+    def _insert_rows(self, cursor, insert_sql: str, rows: Iterable[tuple]) -> int:
+        """Insertar fila a fila; retorna cuántas se guardaron"""
+        saved = 0
+        for values in rows:
             try:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO cards (
-                        card_id, game, name, image_url, type, effect, rarity, 
-                        set_name, price_usd, power, toughness, cost, color, hp, 
-                        abilities, weaknesses, resistances, archetype, source_game
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    card.get('card_id'),
-                    card.get('game'),
-                    card.get('name'),
-                    card.get('image_url'),
-                    card.get('type'),
-                    card.get('effect'),
-                    card.get('rarity'),
-                    card.get('set_name'),
-                    card.get('price_usd'),
-                    card.get('power'),
-                    card.get('toughness'),
-                    card.get('cost'),
-                    card.get('color'),
-                    card.get('hp'),
-                    card.get('abilities'),
-                    card.get('weaknesses'),
-                    card.get('resistances'),
-                    card.get('archetype'),
-                    card.get('source_game')
-                ))
+                cursor.execute(insert_sql, values)
+                saved += 1
             except Exception as e:
-                logger.error(f"Error saving card {card.get('card_id')}: {e}")
+                logger.error(f"Error saving card {values[0]}: {e}")
+        return saved
+    
+    def sync_to_database(self, cards: Iterable[Dict],
+                         games: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Actualización incremental: escribir solo lo que cambió
+        
+        Compara el hash de contenido de cada carta con el guardado, inserta
+        las nuevas, actualiza las modificadas y borra las que ya no vienen
+        en la fuente. Solo borra cartas de `games` (por defecto, los juegos
+        presentes en `cards`), así una fuente ausente no vacía su juego.
+        cards_fts se actualiza solo para las filas cuyo texto cambió.
+        """
+        logger.info("🔄 Sincronizando cartas (incremental)...")
+        started = time.perf_counter()
+        
+        # Con card_id repetido en la fuente gana la última, igual que INSERT OR REPLACE
+        latest = {}
+        for card in cards:
+            values = self._card_values(card)
+            latest[values[0]] = values
+        scope = set(games) if games is not None else {values[1] for values in latest.values()}
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        existing = {
+            card_id: (content_hash, game)
+            for card_id, content_hash, game in cursor.execute('SELECT card_id, content_hash, game FROM cards')
+        }
+        inserts = [values for card_id, values in latest.items() if card_id not in existing]
+        updates = [
+            values for card_id, values in latest.items()
+            if card_id in existing and existing[card_id][0] != values[-1]
+        ]
+        deletes = [
+            card_id for card_id, (_, game) in existing.items()
+            if game in scope and card_id not in latest
+        ]
+        
+        has_fts = self._has_table(cursor, 'cards_fts')
+        reindex = []
+        if has_fts:
+            reindex = self._fts_remove(cursor, updates, deletes)
+        
+        cursor.executemany(self._upsert_sql(), inserts + updates)
+        cursor.executemany('DELETE FROM cards WHERE card_id = ?', ((card_id,) for card_id in deletes))
+        
+        if has_fts:
+            self._fts_add(cursor, [values[0] for values in inserts] + reindex)
         
         conn.commit()
+        has_summary = self._has_table(cursor, 'summary_games')
         conn.close()
-        logger.info("✅ Cards saved to database")
+        
+        counts = {
+            'inserted': len(inserts),
+            'updated': len(updates),
+            'deleted': len(deletes),
+            'unchanged': len(latest) - len(inserts) - len(updates)
+        }
+        if inserts or updates or deletes or not has_summary:
+            self.build_summary_tables()
+        
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"✅ Sync done in {elapsed:.2f}s: {counts['inserted']} inserted, "
+            f"{counts['updated']} updated, {counts['deleted']} deleted, "
+            f"{counts['unchanged']} unchanged"
+        )
+        return counts
     
-    def export_to_csv(self, csv_file: str = "tcg_unified.csv"):
-        """Exportar base de datos a CSV"""
-        logger.info(f"📤 Exportando a CSV: {csv_file}")
+    @staticmethod
+    def _has_table(cursor, name: str) -> bool:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+        return cursor.fetchone() is not None
+    
+    def _fts_remove(self, cursor, updates: List[tuple], deletes: List[str]) -> List[str]:
+        """
+        Quitar de cards_fts las filas que se borran o cuyo texto cambia
+        
+        Una tabla FTS5 external-content necesita los valores antiguos para
+        borrar, así que se leen antes de modificar `cards`. Retorna los
+        card_id actualizados que hay que volver a indexar.
+        """
+        new_text = {}
+        positions = [self.CARD_COLUMNS.index(column) for column in self.FTS_COLUMNS]
+        for values in updates:
+            new_text[values[0]] = tuple(values[i] for i in positions)
+        
+        ids = list(new_text) + deletes
+        if not ids:
+            return []
+        
+        fts_columns = ', '.join(self.FTS_COLUMNS)
+        cursor.execute(f'''
+            SELECT rowid, card_id, {fts_columns} FROM cards
+            WHERE card_id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(ids),))
+        
+        removed = []
+        reindex = []
+        for rowid, card_id, *old_text in cursor.fetchall():
+            if card_id in new_text:
+                if tuple(old_text) == new_text[card_id]:
+                    continue  # Solo cambió precio/imagen/etc: el índice sigue válido
+                reindex.append(card_id)
+            removed.append((rowid, *old_text))
+        
+        placeholders = ', '.join('?' * len(self.FTS_COLUMNS))
+        cursor.executemany(
+            f"INSERT INTO cards_fts(cards_fts, rowid, {fts_columns}) VALUES ('delete', ?, {placeholders})",
+            removed
+        )
+        return reindex
+    
+    def _fts_add(self, cursor, card_ids: List[str]):
+        """Indexar en cards_fts las filas nuevas o con texto modificado"""
+        if not card_ids:
+            return
+        fts_columns = ', '.join(self.FTS_COLUMNS)
+        cursor.execute(f'''
+            INSERT INTO cards_fts(rowid, {fts_columns})
+            SELECT rowid, {fts_columns} FROM cards
+            WHERE card_id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(card_ids),))
+    
+    def has_search_index(self) -> bool:
+        """¿Existe ya cards_fts en la base de datos?"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return self._has_table(conn.cursor(), 'cards_fts')
+        finally:
+            conn.close()
+    
+    def build_search_index(self):
+        """Construir índice FTS5 sobre name/effect/archetype/type para /api/search"""
+        logger.info("🔎 Construyendo índice de búsqueda full-text...")
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM cards ORDER BY game, name')
-        rows = cursor.fetchall()
+        # Tabla external-content: el texto vive en `cards`, FTS solo guarda el índice
+        cursor.execute('DROP TABLE IF EXISTS cards_fts')
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE cards_fts USING fts5(
+                {', '.join(self.FTS_COLUMNS)},
+                content='cards',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        ''')
+        cursor.execute("INSERT INTO cards_fts(cards_fts) VALUES('rebuild')")
+        cursor.execute("INSERT INTO cards_fts(cards_fts) VALUES('optimize')")
+        self._configure_search_rank(cursor)
         
-        cursor.execute("PRAGMA table_info(cards)")
-        columns = [col[1] for col in cursor.fetchall()]
+        conn.commit()
+        conn.close()
+        logger.info("✅ Search index built")
+    
+    def _configure_search_rank(self, cursor):
+        """
+        Guardar en cards_fts la función de ranking por defecto
         
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(columns)
-            writer.writerows(rows)
+        Así `ORDER BY rank` usa bm25 con los pesos por columna y FTS5
+        entrega las filas ya ordenadas, sin que la API repita los pesos.
+        """
+        weights = ', '.join(str(weight) for weight in self.FTS_WEIGHTS)
+        cursor.execute(
+            "INSERT INTO cards_fts(cards_fts, rank) VALUES('rank', ?)",
+            (f'bm25({weights})',)
+        )
+    
+    def configure_search_rank(self):
+        """Actualizar los pesos de ranking de un índice existente (modo incremental)"""
+        conn = sqlite3.connect(self.db_path)
+        self._configure_search_rank(conn.cursor())
+        conn.commit()
+        conn.close()
+    
+    def analyze(self):
+        """
+        Guardar estadísticas de los índices (sqlite_stat1) para el planificador
         
+        Con ellas SQLite decide entre recorrer un índice ya ordenado por
+        nombre u ordenar solo las filas de un rango de precio selectivo.
+        """
+        logger.info("📈 Analizando índices...")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('ANALYZE')
+        conn.commit()
         conn.close()
-        logger.info(f"✅ Exported {len(rows)} cards to {csv_file}")
     
-    def get_stats(self) -> Dict:
-        """Obtener estadísticas de la base de datos"""
+    @staticmethod
+    def _percentile(sorted_values: List[float], pct: int) -> Optional[float]:
+        """Percentil por rango más cercano sobre una lista ordenada"""
+        if not sorted_values:
+            return None
+        rank = max(1, -(-pct * len(sorted_values) // 100))
+        return sorted_values[rank - 1]
+    
+    def build_summary_tables(self):
+        """Precalcular conteos por juego/rareza/set y estadísticas de precio"""
+        logger.info("📊 Construyendo tablas de resumen...")
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT COUNT(*) FROM cards')
-        total = cursor.fetchone()[0]
+        for table in self.SUMMARY_TABLES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        
+        pct_columns = ', '.join(f'p{pct} REAL' for pct in self.PRICE_PERCENTILES)
+        cursor.execute(f'''
+            CREATE TABLE summary_games (
+                game TEXT PRIMARY KEY,
+                card_count INTEGER NOT NULL,
+                priced_count INTEGER NOT NULL,
+                min_price REAL,
+                max_price REAL,
+                avg_price REAL,
+                {pct_columns}
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE summary_rarities (
+                game TEXT NOT NULL,
+                rarity TEXT,
+                card_count INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE summary_sets (
+                game TEXT NOT NULL,
+                set_name TEXT,
+                card_count INTEGER NOT NULL
+            )
+        ''')
         
+        cursor.execute('''
+            INSERT INTO summary_rarities (game, rarity, card_count)
+            SELECT game, rarity, COUNT(*) FROM cards GROUP BY game, rarity
+        ''')
+        cursor.execute('''
+            INSERT INTO summary_sets (game, set_name, card_count)
+            SELECT game, set_name, COUNT(*) FROM cards GROUP BY game, set_name
+        ''')
+        
+        # Precios ordenados por juego: un solo recorrido para todos los percentiles
         cursor.execute('SELECT game, COUNT(*) FROM cards GROUP BY game')
-        by_game = dict(cursor.fetchall())
+        card_counts = dict(cursor.fetchall())
+        prices = {game: [] for game in card_counts}
+        for game, price in conn.execute('''
+            SELECT game, price_usd FROM cards
+            WHERE price_usd IS NOT NULL
+            ORDER BY game, price_usd
+        '''):
+            prices[game].append(price)
+        
+        placeholders = ', '.join('?' * (6 + len(self.PRICE_PERCENTILES)))
+        for game, count in card_counts.items():
+            values = prices[game]
+            cursor.execute(f'INSERT INTO summary_games VALUES ({placeholders})', (
+                game,
+                count,
+                len(values),
+                values[0] if values else None,
+                values[-1] if values else None,
+                sum(values) / len(values) if values else None,
+                *(self._percentile(values, pct) for pct in self.PRICE_PERCENTILES)
+            ))
+        
+        conn.commit()
+        conn.close()
+        logger.info(f"✅ Summary tables built for {len(card_counts)} games")
+    
+    def export(self, output: str, fmt: str = 'csv', partition_by_game: bool = False,
+               chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+        """
+        Exportar la tabla cards leyendo el cursor por bloques
+        
+        Con partition_by_game, output es un directorio con un archivo por
+        juego (output/game=<juego>/cards.<ext>), para que quien lo lea
+        abra solo los juegos que necesita.
+        """
+        writer_class = self.EXPORT_WRITERS[fmt]
+        logger.info(f"📤 Exportando a {fmt}: {output}")
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        table_info = cursor.execute('PRAGMA table_info(cards)').fetchall()
+        columns = [col[1] for col in table_info]
+        types = [col[2] for col in table_info]
+        game_index = columns.index('game')
+        
+        if partition_by_game:
+            Path(output).mkdir(parents=True, exist_ok=True)
+        
+        cursor.execute('SELECT * FROM cards ORDER BY game, name')
         
-        cursor.execute('SELECT rarity, COUNT(*) FROM cards GROUP BY rarity')
-        by_rarity = dict(cursor.fetchall())
+        writer = None
+        current_game = None
+        total = 0
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                
+                if not partition_by_game:
+                    if writer is None:
+                        writer = writer_class(Path(output), columns, types)
+                    writer.write(rows)
+                else:
+                    # ORDER BY game: cada juego ocupa un tramo contiguo
+                    for game, group in itertools.groupby(rows, key=lambda row: row[game_index]):
+                        if game != current_game:
+                            if writer is not None:
+                                writer.close()
+                            slug = re.sub(r'[^\w.-]+', '_', game)
+                            partition = Path(output) / f"game={slug}"
+                            partition.mkdir(exist_ok=True)
+                            writer = writer_class(partition / f"cards.{writer_class.extension}",
+                                                  columns, types)
+                            current_game = game
+                        writer.write(list(group))
+                
+                total += len(rows)
+            
+            # Catálogo vacío: dejar igualmente un archivo con cabecera/esquema
+            if writer is None and not partition_by_game:
+                writer = writer_class(Path(output), columns, types)
+        finally:
+            if writer is not None:
+                writer.close()
+            conn.close()
+        
+        logger.info(f"✅ Exported {total} cards to {output}")
+        return total
+    
+    def export_to_csv(self, csv_file: str = "tcg_unified.csv"):
+        """Exportar base de datos a CSV"""
+        return self.export(csv_file, 'csv')
+    
+    def get_stats(self) -> Dict:
+        """
+        Obtener estadísticas de la base de datos
+        
+        Se leen de las tablas de resumen; en una base de datos anterior a
+        ellas (o sin build_summary_tables) se agregan desde cards.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        if self._has_table(cursor, 'summary_games'):
+            cursor.execute('SELECT game, card_count FROM summary_games')
+            by_game = dict(cursor.fetchall())
+            cursor.execute('SELECT rarity, SUM(card_count) FROM summary_rarities GROUP BY rarity')
+            by_rarity = dict(cursor.fetchall())
+        else:
+            cursor.execute('SELECT game, COUNT(*) FROM cards GROUP BY game')
+            by_game = dict(cursor.fetchall())
+            cursor.execute('SELECT rarity, COUNT(*) FROM cards GROUP BY rarity')
+            by_rarity = dict(cursor.fetchall())
         
         conn.close()
         
         return {
-            'total_cards': total,
+            'total_cards': sum(by_game.values()),
             'by_game': by_game,
             'by_rarity': by_rarity
         }
+    
+    @staticmethod
+    def staging_path(target: str) -> str:
+        """Archivo temporal junto al destino (mismo sistema de archivos, rename atómico)"""
+        return f"{target}.building-{os.getpid()}"
+    
+    @staticmethod
+    def copy_database(source: str, dest: str):
+        """Copiar una base de datos consistente con la API de backup de SQLite"""
+        src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        dst = sqlite3.connect(dest)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+    
+    def publish(self, target: str):
+        """
+        Reemplazar target por la base de datos construida, de forma atómica
+        
+        Los lectores que tengan abierto el archivo anterior siguen leyéndolo
+        hasta cerrarlo; los que abran target después ven el nuevo completo.
+        Nunca existe un target a medio escribir.
+        """
+        with open(self.db_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(self.db_path, target)
+        
+        # Persistir la entrada de directorio del rename
+        directory = os.open(os.path.dirname(os.path.abspath(target)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        except OSError:
+            pass
+        finally:
+            os.close(directory)
+        
+        logger.info(f"📦 Published {self.db_path} -> {target}")
+        self.db_path = target
+
+
+def _parse_task_worker(task: tuple) -> List[Dict]:
+    """Punto de entrada de los workers de load_parallel"""
+    return TCGStandardizer(setup_db=False).parse_task(task)
 
 
 def main():
@@ -493,38 +1355,65 @@ def main():
 ╚═══════════════════════════════════════════════════════════╝
     """)
     
-    standardizer = TCGStandardizer()
-    all_cards = []
-    
-    # Cargar datos (ajustar rutas según tus archivos)
-    print("\n📂 Cargando archivos...\n")
-    
-    # One Piece CSV
-    if Path("one_piece.csv").exists():
-        one_piece_cards = standardizer.load_one_piece_csv("one_piece.csv")
-        all_cards.extend(one_piece_cards)
-    
-    # Yu-Gi-Oh JSON
-    if Path("yugioh.json").exists():
-        yugioh_cards = standardizer.load_yugioh_json("yugioh.json")
-        all_cards.extend(yugioh_cards)
-    
-    # Pokémon JSON
-    if Path("pokemon.json").exists():
-        pokemon_cards = standardizer.load_pokemon_json("pokemon.json")
-        all_cards.extend(pokemon_cards)
+    parser = argparse.ArgumentParser(description="TCG Data Standardizer")
+    parser.add_argument(
+        '--stream', action='store_true',
+        help='Leer los archivos carta por carta en vez de cargarlos enteros (memoria constante)'
+    )
+    parser.add_argument(
+        '--bulk', action='store_true',
+        help='Carga masiva: inserts por lotes sin journal/fsync e índices al final'
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='Actualizar la base de datos existente: solo cartas nuevas, modificadas o eliminadas'
+    )
+    parser.add_argument(
+        '--parallel', type=int, nargs='?', const=0, default=None, metavar='WORKERS',
+        help='Parsear las fuentes en paralelo (por defecto un proceso por CPU)'
+    )
+    parser.add_argument(
+        '--db', default='tcg_unified.db', metavar='PATH',
+        help='Base de datos de salida'
+    )
+    parser.add_argument(
+        '--atomic', action='store_true',
+        help='Construir en un archivo temporal y publicarlo con un rename atómico '
+             '(la API en marcha cambia a la versión nueva sin reiniciar)'
+    )
+    parser.add_argument(
+        '--export', nargs='+', default=['csv'], metavar='FORMAT',
+        choices=sorted(TCGStandardizer.EXPORT_WRITERS),
+        help='Formatos de exportación: csv, ndjson, parquet, arrow (por defecto csv)'
+    )
+    parser.add_argument(
+        '--partition-by-game', action='store_true',
+        help='Exportar un archivo por juego en directorios game=<juego>/'
+    )
+    args = parser.parse_args()
     
-    # Magic JSON
-    if Path("magic.json").exists():
-        magic_cards = standardizer.load_magic_json("magic.json")
-        all_cards.extend(magic_cards)
+    build_path = args.db
+    if args.atomic:
+        build_path = TCGStandardizer.staging_path(args.db)
+        if args.incremental and Path(args.db).exists():
+            TCGStandardizer.copy_database(args.db, build_path)
     
-    # Guardar en base de datos
-    print("\n💾 Guardando en base de datos...\n")
-    standardizer.save_to_database(all_cards)
+    try:
+        standardizer = build_database(args, build_path)
+        if args.atomic:
+            standardizer.publish(args.db)
+    except BaseException:
+        if args.atomic and Path(build_path).exists():
+            os.remove(build_path)
+        raise
     
-    # Exportar a CSV
-    standardizer.export_to_csv()
+    # Exportar (particionado: un directorio por formato)
+    outputs = {
+        fmt: f"tcg_unified_{fmt}" if args.partition_by_game else f"tcg_unified.{fmt}"
+        for fmt in args.export
+    }
+    for fmt, output in outputs.items():
+        standardizer.export(output, fmt, partition_by_game=args.partition_by_game)
     
     # Estadísticas
     stats = standardizer.get_stats()
@@ -538,8 +1427,77 @@ def main():
         print(f"  • {game:20s} - {count:5d} cartas")
     
     print("\n✅ ¡Standardización completada!")
-    print(f"   📦 Base de datos: tcg_unified.db")
-    print(f"   📄 CSV exportado: tcg_unified.csv")
+    print(f"   📦 Base de datos: {args.db}")
+    for output in outputs.values():
+        print(f"   📄 Exportado: {output}")
+
+
+def build_database(args, db_path: str) -> TCGStandardizer:
+    """Cargar las fuentes y escribir la base de datos en db_path"""
+    standardizer = TCGStandardizer(db_path=db_path, incremental=args.incremental)
+    
+    # Cargar datos (ajustar rutas según tus archivos)
+    print("\n📂 Cargando archivos...\n")
+    
+    if args.parallel is not None:
+        sources = [
+            (path, kind) for path, kind in [
+                ("one_piece.csv", 'one_piece'),
+                ("yugioh.json", 'yugioh'),
+                ("pokemon.json", 'pokemon'),
+                ("magic.json", 'magic'),
+            ] if Path(path).exists()
+        ]
+        all_cards = standardizer.load_parallel(sources, workers=args.parallel or None)
+    elif args.stream:
+        sources = [
+            ("one_piece.csv", standardizer.iter_one_piece_csv),
+            ("yugioh.json", standardizer.iter_yugioh_json),
+            ("pokemon.json", standardizer.iter_pokemon_json),
+            ("magic.json", standardizer.iter_magic_json),
+        ]
+        all_cards = itertools.chain.from_iterable(
+            load(path) for path, load in sources if Path(path).exists()
+        )
+    else:
+        all_cards = []
+        
+        # One Piece CSV
+        if Path("one_piece.csv").exists():
+            one_piece_cards = standardizer.load_one_piece_csv("one_piece.csv")
+            all_cards.extend(one_piece_cards)
+        
+        # Yu-Gi-Oh JSON
+        if Path("yugioh.json").exists():
+            yugioh_cards = standardizer.load_yugioh_json("yugioh.json")
+            all_cards.extend(yugioh_cards)
+        
+        # Pokémon JSON
+        if Path("pokemon.json").exists():
+            pokemon_cards = standardizer.load_pokemon_json("pokemon.json")
+            all_cards.extend(pokemon_cards)
+        
+        # Magic JSON
+        if Path("magic.json").exists():
+            magic_cards = standardizer.load_magic_json("magic.json")
+            all_cards.extend(magic_cards)
+    
+    # Guardar en base de datos
+    print("\n💾 Guardando en base de datos...\n")
+    if args.incremental:
+        standardizer.sync_to_database(all_cards)
+        if not standardizer.has_search_index():
+            standardizer.build_search_index()
+        else:
+            standardizer.configure_search_rank()
+        standardizer.analyze()
+    else:
+        standardizer.save_to_database(all_cards, bulk=args.bulk)
+        standardizer.build_search_index()
+        standardizer.build_summary_tables()
+        standardizer.analyze()
+    
+    return standardizer
 
 
 if __name__ == "__main__":